@@ -2,41 +2,135 @@
 from __future__ import annotations
 
 import asyncio
-import tempfile
+import logging
+import threading
 import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
 from pathlib import Path
+from typing import Any
 
-from fastapi import FastAPI, File, HTTPException, UploadFile
+from fastapi import FastAPI, File, Header, HTTPException, UploadFile
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel, Field
 
 from src import config
+from src.agents import clear_compiled_graphs
+from src.cache import SemanticCache
 from src.extraction import DefaultExtractionSchema, run_extraction
-from src.ingest import ingest_documents
-from src.llm_factory import get_llm
+from src.ingest import DEFAULT_EMBEDDING_MODEL, ingest_documents
+from src.llm_factory import get_embeddings, get_llm, get_simple_llm
 from src.mlflow_logging import log_extraction_run, log_qa_run
 from src.qa import run_qa
 
+logger = logging.getLogger(__name__)
+
+
+def _warmup() -> None:
+    """Create the shared clients and open their connections before the first request.
+
+    Each call is capped at API_WARMUP_TIMEOUT seconds. Failures (e.g. no API
+    key yet, provider unreachable) are only logged; the endpoints report them.
+    """
+    timeout = config.API_WARMUP_TIMEOUT
+    try:
+        embeddings = get_embeddings(model=DEFAULT_EMBEDDING_MODEL)
+        # The underlying OpenAI resource takes a per-request timeout; it shares
+        # the embeddings client's connection pool
+        embeddings.client.create(input=["warmup"], model=embeddings.model, timeout=timeout)
+        _get_llm().invoke("ping", max_tokens=1, timeout=timeout)
+    except Exception as e:
+        logger.warning("Startup warmup failed: %s", e)
+
+
+_warmup_task: asyncio.Task | None = None
+
+
+@asynccontextmanager
+async def _lifespan(app: FastAPI):
+    global _warmup_task
+    if config.API_WARMUP:
+        # In the background: the server accepts requests (and /health answers)
+        # right away, even while the provider is slow or unreachable
+        _warmup_task = asyncio.create_task(asyncio.to_thread(_warmup))
+    yield
+
+
 app = FastAPI(
     title="RAG Contract Extraction API",
     description="Document ingestion, extraction, and Q&A for contracts.",
     version="1.0.0",
+    lifespan=_lifespan,
 )
 
-# Single-tenant: one active vector store per process
-_vector_store = None
-_collection_id: str | None = None
+# Ingested collections, least recently used first: collection_id -> (vector
+# store, its /qa semantic cache). Bounded by MAX_COLLECTIONS; requests without a
+# collection_id use the most recently ingested one.
+_stores: "OrderedDict[str, tuple[Any, SemanticCache]]" = OrderedDict()
+_stores_lock = threading.Lock()
+_latest_collection_id: str | None = None
+_llm = None
+
+# Bounds concurrent extract/Q&A work so bursts queue here instead of
+# spawning unbounded threads that all hit the LLM provider at once.
+_inflight = asyncio.Semaphore(config.MAX_CONCURRENCY)
+
+# Dedicated pools per endpoint group instead of the loop's shared default
+# executor, so a long ingest cannot hold up Q&A threads (and vice versa).
+_qa_pool = ThreadPoolExecutor(max_workers=config.API_QA_WORKERS, thread_name_prefix="qa")
+_extract_pool = ThreadPoolExecutor(max_workers=config.API_EXTRACT_WORKERS, thread_name_prefix="extract")
+_ingest_pool = ThreadPoolExecutor(max_workers=config.API_INGEST_WORKERS, thread_name_prefix="ingest")
+
+
+def _get_collection(collection_id: str | None = None) -> tuple[Any, SemanticCache]:
+    """Return (vector store, Q&A cache) for collection_id (default: latest ingest) or raise."""
+    with _stores_lock:
+        if collection_id is None:
+            collection_id = _latest_collection_id
+            if collection_id is None:
+                raise HTTPException(
+                    status_code=400,
+                    detail="No documents ingested. POST /ingest first.",
+                )
+        entry = _stores.get(collection_id)
+        if entry is None:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Unknown or evicted collection_id: {collection_id}. POST /ingest again.",
+            )
+        _stores.move_to_end(collection_id)
+        return entry
 
 
-def _get_vector_store():
-    """Return current vector store or raise."""
-    global _vector_store
-    if _vector_store is None:
-        raise HTTPException(
-            status_code=400,
-            detail="No documents ingested. POST /ingest first.",
-        )
-    return _vector_store
+def _add_collection(collection_id: str, vector_store) -> None:
+    """Register a new collection as the latest, evicting the least recently used."""
+    global _latest_collection_id
+    with _stores_lock:
+        _stores[collection_id] = (vector_store, SemanticCache())
+        _latest_collection_id = collection_id
+        evicted = False
+        while len(_stores) > config.MAX_COLLECTIONS:
+            _stores.popitem(last=False)
+            evicted = True
+    if evicted:
+        # Compiled graphs hold their vector store; drop them so evicted stores
+        # can be freed. Retrieval cache entries go away with the store itself.
+        clear_compiled_graphs()
+
+
+def _get_llm():
+    """Return the shared LLM client, creating it on first use."""
+    global _llm
+    if _llm is None:
+        _llm = get_llm()
+    return _llm
+
+
+async def _run_bounded(fn, pool: ThreadPoolExecutor):
+    """Run blocking fn on pool, at most MAX_CONCURRENCY extract/Q&A calls at a time."""
+    async with _inflight:
+        return await asyncio.get_running_loop().run_in_executor(pool, fn)
 
 
 class IngestResponse(BaseModel):
@@ -46,18 +140,55 @@ class IngestResponse(BaseModel):
 
 class ExtractRequest(BaseModel):
     query: str | None = Field(default=None, description="Optional retrieval query")
+    collection_id: str | None = Field(
+        default=None, description="Collection from /ingest (default: most recent)"
+    )
 
 
 class QaRequest(BaseModel):
     question: str = Field(..., description="Question to ask")
+    collection_id: str | None = Field(
+        default=None, description="Collection from /ingest (default: most recent)"
+    )
+
+
+# Response models let FastAPI serialize straight to JSON bytes in pydantic-core
+# instead of walking plain dicts through jsonable_encoder and json.dumps.
+class SourceChunk(BaseModel):
+    content: str
+    metadata: dict[str, Any]
+
+
+class ExtractResponse(BaseModel):
+    record: dict[str, Any]
+    uncertain_fields: list[Any]
+    validation_errors: list[str]
+    needs_review: bool
+    review_reason: str
+    sources: list[SourceChunk]
+
+
+class ExtractAgentsResponse(ExtractResponse):
+    summary: str
+
+
+class QaResponse(BaseModel):
+    answer: str
+    confidence: float | None
+    needs_review: bool
+    review_reason: str
+    sources: list[SourceChunk]
 
 
 def _serialize_chunks(chunks):
     """Serialize Document chunks for JSON response."""
-    return [
-        {"content": doc.page_content[:500], "metadata": doc.metadata}
-        for doc in chunks
-    ]
+    serialized = []
+    for doc in chunks:
+        # Sliced here rather than stored at ingest: a stored preview would be a
+        # second copy of nearly every chunk's text in the docstore
+        preview = doc.page_content[: config.SOURCE_PREVIEW_CHARS]
+        serialized.append({"content": preview, "metadata": dict(doc.metadata)})
+    return serialized
 
 
 @app.post("/ingest", response_model=IngestResponse)
@@ -67,63 +198,51 @@ async def ingest(files: list[UploadFile] = File(...)):
         raise HTTPException(status_code=400, detail="No files provided")
 
     valid_suffixes = {".txt", ".pdf"}
-    paths = []
-    display_names = []
-
-    try:
-        for f in files:
-            suffix = Path(f.filename or "").suffix.lower()
-            if suffix not in valid_suffixes:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Unsupported file type: {suffix}. Use .txt or .pdf.",
-                )
-            tmp = tempfile.NamedTemporaryFile(delete=False, suffix=suffix)
-            content = await f.read()
-            tmp.write(content)
-            tmp.close()
-            paths.append(tmp.name)
-            display_names.append(f.filename or tmp.name)
-
-        def _do_ingest():
-            global _vector_store, _collection_id
-            collection_id = str(uuid.uuid4())
-            _vector_store = ingest_documents(
-                paths,
-                file_display_names=display_names,
-                collection_name=f"rag_{collection_id}",
+    for f in files:
+        suffix = Path(f.filename or "").suffix.lower()
+        if suffix not in valid_suffixes:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unsupported file type: {suffix}. Use .txt or .pdf.",
             )
-            _collection_id = collection_id
-            return collection_id
+    # Uploads are already spooled by Starlette; ingest reads them in place
+    # instead of copying each one to a temp file first.
+    sources = [(f.filename, f.file) for f in files]
+
+    def _do_ingest():
+        collection_id = str(uuid.uuid4())
+        vector_store = ingest_documents(
+            sources,
+            collection_name=f"rag_{collection_id}",
+            batch_size=config.EMBED_BATCH_SIZE,
+            concurrent_embeddings=config.EMBED_CONCURRENCY,
+        )
+        _add_collection(collection_id, vector_store)
+        return collection_id
 
-        collection_id = await asyncio.to_thread(_do_ingest)
+    try:
+        collection_id = await asyncio.get_running_loop().run_in_executor(_ingest_pool, _do_ingest)
         return IngestResponse(status="ok", collection_id=collection_id)
 
     except Exception as e:
         detail = str(e)
-        if "OPENAI_API_KEY" in detail.upper() or "api_key" in detail.lower():
+        # One case-insensitive check; "api_key" also covers "OPENAI_API_KEY"
+        if "api_key" in detail.lower():
             detail = "OPENAI_API_KEY not set or invalid. Add it in Azure App Settings."
         raise HTTPException(status_code=500, detail=detail)
 
-    finally:
-        for p in paths:
-            try:
-                Path(p).unlink(missing_ok=True)
-            except Exception:
-                pass
 
-
-@app.post("/extract-agents")
+@app.post("/extract-agents", response_model=ExtractAgentsResponse)
 async def extract_agents(req: ExtractRequest | None = None):
-    """Multi-agent extraction (Extraction -> Validation -> Summary) via LangGraph."""
-    vs = _get_vector_store()
-    llm = get_llm()
+    """Multi-agent extraction (Extraction + summary -> Validation [-> Summary fallback]) via LangGraph."""
+    vs, _ = _get_collection(req.collection_id if req else None)
+    llm = _get_llm()
 
     def _do_extract():
         from src.agents import run_extraction_agents
         return run_extraction_agents(vs, DefaultExtractionSchema, llm)
 
-    result = await asyncio.to_thread(_do_extract)
+    result = await _run_bounded(_do_extract, _extract_pool)
     log_extraction_run(
         result,
         run_type="extraction_agents",
@@ -141,11 +260,11 @@ async def extract_agents(req: ExtractRequest | None = None):
     }
 
 
-@app.post("/extract")
+@app.post("/extract", response_model=ExtractResponse)
 async def extract(req: ExtractRequest | None = None):
     """Extract structured fields (dates, parties, amounts, terms) from ingested docs."""
-    vs = _get_vector_store()
-    llm = get_llm()
+    vs, _ = _get_collection(req.collection_id if req else None)
+    llm = _get_llm()
     query = req.query if req and req.query else None
 
     def _do_extract():
@@ -156,7 +275,7 @@ async def extract(req: ExtractRequest | None = None):
             query=query,
         )
 
-    result = await asyncio.to_thread(_do_extract)
+    result = await _run_bounded(_do_extract, _extract_pool)
     log_extraction_run(
         result,
         chunk_size=config.CHUNK_SIZE,
@@ -172,27 +291,54 @@ async def extract(req: ExtractRequest | None = None):
     }
 
 
-@app.post("/qa")
-async def qa(req: QaRequest):
-    """Ask a question over ingested documents. Returns answer with sources and review status."""
-    vs = _get_vector_store()
-    llm = get_llm()
+@app.post("/qa", response_model=QaResponse)
+async def qa(req: QaRequest, cache_control: str | None = Header(default=None)):
+    """
+    Ask a question over ingested documents. Returns answer with sources and review status.
+
+    With QA_CACHE_SIZE > 0, near-duplicate questions are answered from a
+    semantic cache (answers that need review are never cached); send
+    "Cache-Control: no-cache" to force a fresh answer (e.g. for eval runs).
+    """
+    vs, qa_cache = _get_collection(req.collection_id)
+    llm = _get_llm()
+    simple_llm = get_simple_llm()
+    use_cache = "no-cache" not in (cache_control or "").lower()
 
     def _do_qa():
-        return run_qa(req.question, vs, llm)
+        embeddings = vs.embeddings or get_embeddings()
+        embedding = embeddings.embed_query(req.question)
+        cached = qa_cache.get(embedding) if use_cache else None
+        if cached is not None:
+            return cached, None
+        result = run_qa(req.question, vs, llm, query_embedding=embedding, simple_llm=simple_llm)
+        return result, embedding
+
+    result, embedding = await _run_bounded(_do_qa, _qa_pool)
+    if embedding is None:
+        return result
 
-    result = await asyncio.to_thread(_do_qa)
     log_qa_run(result, top_k=config.RETRIEVAL_TOP_K)
-    return {
+    response = {
         "answer": result["answer"],
         "confidence": result["confidence"],
         "needs_review": result["needs_review"],
         "review_reason": result["review_reason"],
         "sources": _serialize_chunks(result["source_chunks"]),
     }
+    # A flagged answer is not worth repeating to the next, similar question
+    if not response["needs_review"]:
+        qa_cache.put(embedding, response)
+    return response
 
 
 @app.get("/health")
 async def health():
-    """Health check."""
-    return {"status": "ok", "documents_loaded": _vector_store is not None}
+    """Health check; answers without waiting for the startup warmup."""
+    with _stores_lock:
+        collections = list(_stores)
+    return {
+        "status": "ok",
+        "documents_loaded": _latest_collection_id is not None,
+        "collections": collections,
+    }
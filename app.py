@@ -2,9 +2,7 @@
 from __future__ import annotations
 
 import os
-import tempfile
 import time
-from pathlib import Path
 
 import streamlit as st
 from dotenv import load_dotenv
@@ -18,6 +16,7 @@ try:
 except Exception:
     pass
 
+from src import config
 from src.agents import run_extraction_agents
 from src.extraction import DefaultExtractionSchema, run_extraction
 from src.ingest import ingest_documents
@@ -113,16 +112,20 @@ st.markdown("""
 # Session state
 if "vector_store" not in st.session_state:
     st.session_state["vector_store"] = None
-if "llm" not in st.session_state:
-    st.session_state["llm"] = None
 
 
+@st.cache_resource
 def get_llm():
-    """Lazy init LLM (OpenAI or Azure) via llm_factory."""
-    if st.session_state["llm"] is None:
-        from src.llm_factory import get_llm as _get_llm
-        st.session_state["llm"] = _get_llm()
-    return st.session_state["llm"]
+    """Lazy init LLM (OpenAI or Azure) via llm_factory, shared by all sessions."""
+    from src.llm_factory import get_llm as _get_llm
+    return _get_llm()
+
+
+@st.cache_resource
+def get_simple_llm():
+    """Optional cheaper Q&A model for short factual questions (None: routing off)."""
+    from src.llm_factory import get_simple_llm as _get_simple_llm
+    return _get_simple_llm()
 
 
 def main():
@@ -199,26 +202,15 @@ def render_ingest():
         progress_bar = st.progress(0.0, text="Preparing…")
         status = st.empty()
         try:
-            paths = []
-            for f in uploaded:
-                suffix = Path(f.name).suffix.lower()
-                with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-                    tmp.write(f.read())
-                    paths.append(tmp.name)
-
             def on_progress(msg: str, p: float) -> None:
                 progress_bar.progress(min(1.0, max(0.0, p)), text=msg)
                 status.caption(msg)
                 time.sleep(0.05)
 
-            display_names = [f.name for f in uploaded]
-            vector_store = ingest_documents(paths, progress_callback=on_progress, file_display_names=display_names)
+            # Uploads are already in memory; ingest them without temp-file round-trips
+            sources = [(f.name, f.getvalue()) for f in uploaded]
+            vector_store = ingest_documents(sources, progress_callback=on_progress)
             st.session_state["vector_store"] = vector_store
-            for p in paths:
-                try:
-                    Path(p).unlink(missing_ok=True)
-                except Exception:
-                    pass
             progress_bar.progress(1.0, text="Done.")
             status.empty()
             st.balloons()
@@ -254,7 +246,7 @@ def render_qa():
         with st.spinner("Retrieving and generating..."):
             try:
                 llm = get_llm()
-                result = run_qa(question, vs, llm)
+                result = run_qa(question, vs, llm, simple_llm=get_simple_llm())
 
                 # Answer section
                 st.markdown("### Answer")
@@ -275,7 +267,8 @@ def render_qa():
                 for i, doc in enumerate(result["source_chunks"], 1):
                     source = doc.metadata.get("source", "unknown")
                     with st.expander(f"Chunk {i} — {source}"):
-                        content = doc.page_content[:600] + ("..." if len(doc.page_content) > 600 else "")
+                        preview = doc.page_content[: config.SOURCE_PREVIEW_CHARS]
+                        content = preview + ("..." if len(doc.page_content) > len(preview) else "")
                         st.text(content)
 
                 # Review status
@@ -301,7 +294,7 @@ def render_extraction():
         st.warning("📭 No documents loaded. Go to **Ingest** and upload files first.")
         return
 
-    use_agents = st.checkbox("Use multi-agent flow (LangGraph)", value=False, help="Extraction → Validation → Summary agents")
+    use_agents = st.checkbox("Use multi-agent flow (LangGraph)", value=False, help="Extraction + summary → Validation agents (Summary agent as fallback)")
 
     col1, col2, col3 = st.columns([1, 1, 2])
     with col1:
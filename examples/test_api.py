@@ -11,6 +11,7 @@ sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
 try:
     import requests
+    from requests.adapters import HTTPAdapter
 except ImportError:
     print("Install requests: pip install requests")
     sys.exit(1)
@@ -26,9 +27,16 @@ def main(base_url: str = BASE_URL) -> None:
     print(f"Base URL: {base_url}")
     print("=" * 50)
 
+    # One pooled session so every call reuses the same keep-alive connection
+    # (no repeated TCP/TLS handshakes skewing latency against Azure).
+    s = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8)
+    s.mount("http://", adapter)
+    s.mount("https://", adapter)
+
     # 1. Health
     print("\n[1/4] Health check...")
-    r = requests.get(f"{base_url}/health")
+    r = s.get(f"{base_url}/health")
     print(json.dumps(r.json(), indent=2))
 
     # 2. Ingest
@@ -37,19 +45,19 @@ def main(base_url: str = BASE_URL) -> None:
         print(f"ERROR: {SAMPLE_FILE} not found")
         sys.exit(1)
     with open(SAMPLE_FILE, "rb") as f:
-        r = requests.post(f"{base_url}/ingest", files={"files": ("sample_contract.txt", f)})
+        r = s.post(f"{base_url}/ingest", files={"files": ("sample_contract.txt", f)})
     print(json.dumps(r.json(), indent=2))
 
     # 3. Extract
     print("\n[3/4] Extracting structured data...")
-    r = requests.post(f"{base_url}/extract", json={})
+    r = s.post(f"{base_url}/extract", json={})
     data = r.json()
     print("Record:", json.dumps(data.get("record", {}), indent=2))
     print("Needs review:", data.get("needs_review"))
 
     # 4. Q&A
     print("\n[4/4] Q&A: What is the total contract value?")
-    r = requests.post(f"{base_url}/qa", json={"question": "What is the total contract value?"})
+    r = s.post(f"{base_url}/qa", json={"question": "What is the total contract value?"})
     data = r.json()
     print("Answer:", data.get("answer", "")[:200], "...")
     print("Confidence:", data.get("confidence"))
@@ -1,6 +1,6 @@
 """Multi-agent extraction workflow (LangGraph)."""
 from __future__ import annotations
 
-from .graph import run_extraction_agents
+from .graph import clear_compiled_graphs, run_extraction_agents
 
-__all__ = ["run_extraction_agents"]
+__all__ = ["clear_compiled_graphs", "run_extraction_agents"]
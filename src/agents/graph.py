@@ -1,6 +1,8 @@
-"""LangGraph multi-agent flow: Extraction -> Validation -> Summary."""
+"""LangGraph multi-agent flow: Extraction (+ summary) -> Validation [-> Summary]."""
 from __future__ import annotations
 
+import threading
+from collections import OrderedDict
 from typing import Any, List, Type
 
 from langchain_core.documents import Document
@@ -11,12 +13,13 @@ from pydantic import BaseModel
 from typing_extensions import TypedDict
 
 from ..extraction import (
-    EXTRACTION_SYSTEM,
-    EXTRACTION_USER_TEMPLATE,
+    _SYSTEM_MSG,
     DefaultExtractionSchema,
+    _extract_json_object,
     _format_context,
-    _parse_extraction_response,
-    _schema_description,
+    _record_from_data,
+    _prompt_prefix,
+    _schema_query,
     _validate_record,
 )
 from ..gates import extraction_needs_review
@@ -38,11 +41,54 @@ class ExtractionState(TypedDict, total=False):
 
 SUMMARY_SYSTEM = """You write a very brief human-readable summary (2-4 sentences) of the extracted contract data. Focus on the key parties, amounts, dates, and main terms. Be concise."""
 
-SUMMARY_USER_TEMPLATE = """Extracted contract data:
+_SUMMARY_SYSTEM_MSG = SystemMessage(content=SUMMARY_SYSTEM)
 
-{record}
+# Static instructions before the dynamic part so prompt prefixes stay cacheable.
+SUMMARY_USER_TEMPLATE = """Write a short summary for a human reviewer of the extracted contract data below.
 
-Write a short summary for a human reviewer."""
+Extracted contract data:
+
+{record}"""
+
+# Extraction and summary in one LLM call: the record is nested under "record" so
+# the reviewer summary cannot collide with a schema field that is also named "summary".
+EXTRACTION_SUMMARY_USER_TEMPLATE = """Extract the following fields into a JSON object. Use the exact field names. Add an "uncertain_fields" array if any value is uncertain.
+
+Schema / fields:
+{schema_desc}
+
+Also write a very brief human-readable summary (2-4 sentences) of the extracted data for a human reviewer, focusing on the key parties, amounts, dates, and main terms.
+
+Output only one JSON object of the form:
+{{"record": {{<field names as keys>}}, "uncertain_fields": [<optional field names>], "summary": "<reviewer summary>"}}
+
+Context (chunks from the document):
+
+{context}"""
+
+
+def _parse_extraction_summary_response(
+    content: str, schema: Type[BaseModel]
+) -> tuple[dict[str, Any], List[str], str | None]:
+    """Parse a fused response into (record, uncertain_fields, summary).
+
+    Falls back to treating the whole object as a flat record (no summary) when the
+    model ignores the nested layout.
+    """
+    data = _extract_json_object(content)
+    if data is None:
+        return {}, ["parse_error"], None
+    nested = data.get("record")
+    if not isinstance(nested, dict):
+        record, uncertain = _record_from_data(data, schema)
+        return record, uncertain, None
+
+    record, uncertain = _record_from_data(nested, schema)
+    if not uncertain and isinstance(data.get("uncertain_fields"), list):
+        uncertain = list(data["uncertain_fields"])
+    summary = data.get("summary")
+    summary = summary.strip() if isinstance(summary, str) else ""
+    return record, uncertain, summary or None
 
 
 def _build_extraction_node(
@@ -53,28 +99,24 @@ def _build_extraction_node(
     """Build extraction agent node (closure over deps)."""
 
     def extraction_node(state: dict) -> dict:
-        query = " ".join(schema.model_fields.keys())
+        query = _schema_query(schema)
         chunks = retrieve(vector_store, query)
         context = _format_context(chunks)
-        schema_desc = _schema_description(schema)
-
-        user_msg = EXTRACTION_USER_TEMPLATE.format(
-            context=context, schema_desc=schema_desc
-        )
-        messages = [
-            SystemMessage(content=EXTRACTION_SYSTEM),
-            HumanMessage(content=user_msg),
-        ]
+        user_msg = _prompt_prefix(EXTRACTION_SUMMARY_USER_TEMPLATE, schema) + context
+        messages = [_SYSTEM_MSG, HumanMessage(content=user_msg)]
         response = llm.invoke(messages)
         content = getattr(response, "content", str(response))
-        record, uncertain = _parse_extraction_response(content, schema)
+        record, uncertain, summary = _parse_extraction_summary_response(content, schema)
 
-        return {
+        update = {
             "chunks": chunks,
             "raw_extraction": content,
             "record": record,
             "uncertain_fields": uncertain,
         }
+        if summary:
+            update["summary"] = summary
+        return update
 
     return extraction_node
 
@@ -114,10 +156,7 @@ def _build_summary_node(llm: BaseChatModel):
             return {"summary": "No data extracted."}
 
         user_msg = SUMMARY_USER_TEMPLATE.format(record=record_str)
-        messages = [
-            SystemMessage(content=SUMMARY_SYSTEM),
-            HumanMessage(content=user_msg),
-        ]
+        messages = [_SUMMARY_SYSTEM_MSG, HumanMessage(content=user_msg)]
         response = llm.invoke(messages)
         summary = getattr(response, "content", str(response)).strip()
 
@@ -126,24 +165,40 @@ def _build_summary_node(llm: BaseChatModel):
     return summary_node
 
 
-def run_extraction_agents(
+# (schema, id(llm), id(vector_store), detailed_review_summary) -> compiled graph.
+# Each compiled graph holds its llm and vector store, so the ids stay valid while
+# cached; the bound keeps replaced stores from piling up.
+_COMPILED_GRAPHS: "OrderedDict[tuple, Any]" = OrderedDict()
+_COMPILED_GRAPHS_MAX = 8
+_COMPILED_GRAPHS_LOCK = threading.Lock()
+
+
+def clear_compiled_graphs() -> None:
+    """Drop all cached compiled graphs (call after replacing a vector store)."""
+    with _COMPILED_GRAPHS_LOCK:
+        _COMPILED_GRAPHS.clear()
+
+
+def _build_graph(
     vector_store: VectorStore,
     schema: Type[BaseModel],
     llm: BaseChatModel,
-    query: str | None = None,
-    top_k: int | None = None,
-) -> dict[str, Any]:
-    """
-    Run multi-agent extraction: Extraction -> Validation -> Summary.
-
-    Returns same shape as run_extraction plus "summary" key.
-    """
+    detailed_review_summary: bool,
+):
+    """Build and compile the extraction graph."""
     from langgraph.graph import END, START, StateGraph
 
     extraction_node = _build_extraction_node(vector_store, llm, schema)
     validation_node = _build_validation_node(schema)
     summary_node = _build_summary_node(llm)
 
+    def route_after_validation(state: dict) -> str:
+        if not state.get("summary"):
+            return "summary"
+        if detailed_review_summary and state.get("needs_review"):
+            return "summary"
+        return END
+
     graph = StateGraph(ExtractionState)
 
     graph.add_node("extraction", extraction_node)
@@ -152,10 +207,52 @@ def run_extraction_agents(
 
     graph.add_edge(START, "extraction")
     graph.add_edge("extraction", "validation")
-    graph.add_edge("validation", "summary")
+    graph.add_conditional_edges("validation", route_after_validation, ["summary", END])
     graph.add_edge("summary", END)
 
-    compiled = graph.compile()
+    return graph.compile()
+
+
+def _get_compiled_graph(
+    vector_store: VectorStore,
+    schema: Type[BaseModel],
+    llm: BaseChatModel,
+    detailed_review_summary: bool,
+):
+    """Return the compiled graph for these deps, compiling it on first use."""
+    key = (schema, id(llm), id(vector_store), detailed_review_summary)
+    with _COMPILED_GRAPHS_LOCK:
+        compiled = _COMPILED_GRAPHS.get(key)
+        if compiled is not None:
+            _COMPILED_GRAPHS.move_to_end(key)
+            return compiled
+
+    compiled = _build_graph(vector_store, schema, llm, detailed_review_summary)
+    with _COMPILED_GRAPHS_LOCK:
+        _COMPILED_GRAPHS[key] = compiled
+        while len(_COMPILED_GRAPHS) > _COMPILED_GRAPHS_MAX:
+            _COMPILED_GRAPHS.popitem(last=False)
+    return compiled
+
+
+def run_extraction_agents(
+    vector_store: VectorStore,
+    schema: Type[BaseModel],
+    llm: BaseChatModel,
+    query: str | None = None,
+    top_k: int | None = None,
+    detailed_review_summary: bool = False,
+) -> dict[str, Any]:
+    """
+    Run multi-agent extraction: Extraction (+ summary) -> Validation [-> Summary].
+
+    The extraction node asks for the record and the reviewer summary in a single
+    LLM call. The separate summary node only runs when that summary is missing,
+    or when detailed_review_summary is set and the record needs review.
+
+    Returns same shape as run_extraction plus "summary" key.
+    """
+    compiled = _get_compiled_graph(vector_store, schema, llm, detailed_review_summary)
     result = compiled.invoke({})
 
     return {
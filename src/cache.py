@@ -0,0 +1,88 @@
+"""Semantic response cache: reuse answers for near-duplicate questions."""
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, List
+
+import numpy as np
+
+from . import config
+
+
+class SemanticCache:
+    """
+    In-process cache of (question embedding, response) pairs.
+
+    get() returns the response whose question embedding has the highest cosine
+    similarity to the given one, provided it clears the threshold and has not
+    expired. Once maxsize entries are held, the oldest are evicted first.
+    """
+
+    def __init__(
+        self,
+        threshold: float | None = None,
+        maxsize: int | None = None,
+        ttl: float | None = None,
+    ) -> None:
+        self.threshold = threshold if threshold is not None else config.QA_CACHE_THRESHOLD
+        self.maxsize = maxsize if maxsize is not None else config.QA_CACHE_SIZE
+        self.ttl = ttl if ttl is not None else config.QA_CACHE_TTL
+        self._lock = threading.Lock()
+        self._vectors: np.ndarray | None = None  # unit-norm rows, oldest first
+        self._values: List[Any] = []
+        self._expires: List[float] = []
+
+    def get(self, embedding: List[float]) -> Any | None:
+        """Return the cached response for a similar question, or None."""
+        query = _normalize(embedding)
+        with self._lock:
+            self._drop_expired(time.monotonic())
+            if not self._values or self._vectors.shape[1] != query.shape[0]:
+                return None
+            scores = self._vectors @ query
+            best = int(np.argmax(scores))
+            if scores[best] >= self.threshold:
+                return self._values[best]
+        return None
+
+    def put(self, embedding: List[float], value: Any) -> None:
+        """Cache value under the question embedding."""
+        if self.maxsize <= 0:
+            return
+        row = _normalize(embedding)[np.newaxis, :]
+        with self._lock:
+            if self._vectors is None or self._vectors.shape[1] != row.shape[1]:
+                self._vectors = row
+                self._values, self._expires = [], []
+            else:
+                self._vectors = np.vstack([self._vectors, row])
+            self._values.append(value)
+            self._expires.append(time.monotonic() + self.ttl)
+            self._drop_oldest(len(self._values) - self.maxsize)
+
+    def clear(self) -> None:
+        """Drop all entries (e.g. when the underlying documents change)."""
+        with self._lock:
+            self._vectors = None
+            self._values, self._expires = [], []
+
+    def _drop_expired(self, now: float) -> None:
+        # Entries share one TTL and are stored oldest first, so expired ones form a prefix.
+        n = 0
+        while n < len(self._expires) and self._expires[n] <= now:
+            n += 1
+        self._drop_oldest(n)
+
+    def _drop_oldest(self, n: int) -> None:
+        if n <= 0:
+            return
+        self._vectors = self._vectors[n:]
+        del self._values[:n]
+        del self._expires[:n]
+
+
+def _normalize(embedding: List[float]) -> np.ndarray:
+    vec = np.asarray(embedding, dtype=np.float32)
+    norm = float(np.linalg.norm(vec))
+    return vec / norm if norm > 0 else vec
@@ -1,92 +1,254 @@
 """Document chunking strategies for RAG ingestion."""
 from __future__ import annotations
 
-from typing import List
+import re
+from collections import deque
+from functools import lru_cache
+from typing import Iterable, Iterator, List, Tuple
 
 from . import config
 
 
-def _chunk_fixed_overlap(
-    text: str,
+def _stripped_bounds(text: str, start: int, end: int) -> Tuple[int, int]:
+    """Bounds of text[start:end] without surrounding whitespace (same rule as str.strip)."""
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return start, end
+
+
+def _iter_fixed_overlap(
+    pieces: Iterable[str],
     chunk_size: int,
     chunk_overlap: int,
     separators: List[str],
-) -> List[str]:
-    """Split text into chunks of fixed size with overlap, trying separators first."""
-    if not text or not text.strip():
-        return []
-    text = text.strip()
-    if len(text) <= chunk_size:
-        return [text] if text else []
+) -> Iterator[str]:
+    """
+    Yield fixed_overlap chunks of "".join(pieces) without building the joined text.
 
-    chunks: List[str] = []
-    start = 0
+    Only the unconsumed tail plus incoming pieces are buffered. A window is cut
+    once the buffer holds non-whitespace past its end, which is exactly when the
+    whole-text algorithm would know the window is not the last one, so the
+    output is identical to chunking the joined (stripped) text.
+    """
+    seps = [sep for sep in separators if sep]  # "" never splits; hard cut covers it
+    pieces = iter(pieces)
+    buf = ""
+    start = 0  # window start within buf
+    last = -1  # index in buf of the last non-whitespace char seen so far
+    leading = True
+    exhausted = False
 
-    while start < len(text):
+    while True:
         end = start + chunk_size
-        if end >= len(text):
-            chunk = text[start:].strip()
-            if chunk:
-                chunks.append(chunk)
-            break
+        while not exhausted and last < end:
+            piece = next(pieces, None)
+            if piece is None:
+                exhausted = True
+                break
+            if leading:
+                # The text is stripped as a whole: drop its leading whitespace
+                piece = piece.lstrip()
+                if not piece:
+                    continue
+                leading = False
+            content_len = len(piece.rstrip())
+            if content_len:
+                last = len(buf) + content_len - 1
+            buf += piece
 
-        # Prefer splitting on a separator
-        segment = text[start:end]
+        if exhausted and end > last:
+            # Final window: the rest of the (right-stripped) text
+            a, b = _stripped_bounds(buf, start, last + 1)
+            if a < b:
+                yield buf[a:b]
+            return
+
+        # Prefer splitting on a separator. Searching buf within [start, end)
+        # avoids copying the window; str.rfind is the same C fast search.
         split_at = -1
-        for sep in separators:
-            if not sep:
-                continue
-            pos = segment.rfind(sep)
+        for sep in seps:
+            pos = buf.rfind(sep, start, end)
             if pos != -1:
-                split_at = start + pos + len(sep)
+                split_at = pos + len(sep)
                 break
 
+        prev_start = start
         if split_at > start:
-            chunk = text[start:split_at].strip()
+            a, b = _stripped_bounds(buf, start, split_at)
             start = split_at - chunk_overlap
             if start < 0:
                 start = 0
             # Avoid re-including too much
             if chunk_overlap > 0 and start > 0:
                 start = min(start, split_at - 1)
+            # A separator inside the first chunk_overlap chars would move the
+            # window back to (or before) where it started and loop forever.
+            if start <= prev_start:
+                start = split_at
         else:
-            chunk = text[start:end].strip()
+            a, b = _stripped_bounds(buf, start, end)
             start = end - chunk_overlap
+            if start <= prev_start:
+                start = end
 
-        if chunk:
-            chunks.append(chunk)
+        if a < b:
+            yield buf[a:b]
 
-    return chunks
+        # Nothing before start is looked at again; drop it once it is the larger
+        # part of the buffer, so each char is copied O(1) times overall
+        if start > chunk_size and 2 * start > len(buf):
+            buf = buf[start:]
+            last -= start
+            start = 0
 
 
-def _chunk_by_paragraph(text: str, max_chunk_size: int) -> List[str]:
-    """Split by paragraphs, merging short ones up to max_chunk_size."""
-    if not text or not text.strip():
+def _chunk_fixed_overlap(
+    text: str,
+    chunk_size: int,
+    chunk_overlap: int,
+    separators: List[str],
+) -> List[str]:
+    """Split text into chunks of fixed size with overlap, trying separators first."""
+    if not text:
         return []
-    paragraphs = [p.strip() for p in text.split("\n\n") if p.strip()]
-    if not paragraphs:
-        return [text.strip()] if text.strip() else []
+    return list(_iter_fixed_overlap((text,), chunk_size, chunk_overlap, separators))
 
-    chunks: List[str] = []
-    current: List[str] = []
-    current_len = 0
 
+def _iter_paragraphs(pieces: Iterable[str]) -> Iterator[str]:
+    """Yield the stripped, non-empty paragraphs of "".join(pieces), split on blank lines."""
+    rest = ""
+    for piece in pieces:
+        # rest holds no complete separator, so a new one can start at most one char back
+        scan_from = max(len(rest) - 1, 0)
+        rest += piece
+        if rest.find("\n\n", scan_from) == -1:
+            continue
+        parts = rest.split("\n\n")
+        rest = parts.pop()
+        for p in parts:
+            if stripped := p.strip():
+                yield stripped
+    if stripped := rest.strip():
+        yield stripped
+
+
+def _group_paragraphs(paragraphs: Iterable[str], max_chunk_size: int) -> Iterator[str]:
+    """Merge consecutive paragraphs up to max_chunk_size, joining each group once."""
+    group: List[str] = []
+    group_len = 0
     for p in paragraphs:
         p_len = len(p) + 2  # +2 for "\n\n"
-        if current_len + p_len <= max_chunk_size or not current:
-            current.append(p)
-            current_len += p_len
-        else:
-            if current:
-                chunks.append("\n\n".join(current))
-            current = [p]
-            current_len = p_len
+        if group and group_len + p_len > max_chunk_size:
+            yield "\n\n".join(group)
+            group = []
+            group_len = 0
+        group.append(p)
+        group_len += p_len
+    if group:
+        yield "\n\n".join(group)
+
+
+def _chunk_by_paragraph(text: str, max_chunk_size: int) -> List[str]:
+    """Split by paragraphs, merging short ones up to max_chunk_size."""
+    if not text:
+        return []
+    paragraphs = (stripped for p in text.split("\n\n") if (stripped := p.strip()))
+    return list(_group_paragraphs(paragraphs, max_chunk_size))
+
+
+@lru_cache(maxsize=16)
+def _compile_levels(patterns: Tuple[str, ...]) -> Tuple[re.Pattern[str], ...]:
+    """Compile recursive_regex separator levels once per distinct list."""
+    return tuple(re.compile(p) for p in patterns)
 
-    if current:
-        chunks.append("\n\n".join(current))
+
+def _split_at_matches(text: str, pattern: re.Pattern[str]) -> List[str]:
+    """Cut text at the start of every match (or of its group 1, if it has one).
+
+    The pieces concatenate back to text.
+    """
+    pieces = []
+    prev = 0
+    if not pattern.groups:
+        for m in pattern.finditer(text):
+            pos = m.start()
+            if pos > prev:
+                pieces.append(text[prev:pos])
+                prev = pos
+        pieces.append(text[prev:])
+        return pieces
+    search = pattern.search
+    start = 0
+    while m := search(text, start):
+        pos = m.start(1)
+        if pos > prev:
+            pieces.append(text[prev:pos])
+            prev = pos
+        # The context before group 1 may reuse the tail of this match, as a
+        # lookbehind would: resume that many characters before its end
+        start = max(m.end() - (pos - m.start()), m.start() + 1)
+    pieces.append(text[prev:])
+    return pieces
+
+
+def _split_recursive(
+    text: str, levels: Tuple[re.Pattern[str], ...], chunk_size: int
+) -> Iterator[str]:
+    """Yield pieces of at most chunk_size, splitting on the highest level that applies."""
+    if len(text) <= chunk_size:
+        yield text
+        return
+    for i, pattern in enumerate(levels):
+        pieces = _split_at_matches(text, pattern)
+        if len(pieces) > 1:
+            for piece in pieces:
+                yield from _split_recursive(piece, levels[i + 1 :], chunk_size)
+            return
+    # No level splits this piece: hard cut
+    for i in range(0, len(text), chunk_size):
+        yield text[i : i + chunk_size]
+
+
+def _chunk_recursive_regex(
+    text: str,
+    chunk_size: int,
+    chunk_overlap: int,
+    separators: List[str],
+) -> List[str]:
+    """Split on regex levels high to low, then merge pieces up to chunk_size with overlap."""
+    if not text:
+        return []
+    levels = _compile_levels(tuple(separators))
+    chunks: List[str] = []
+    window: deque[str] = deque()
+    total = 0
+    for piece in _split_recursive(text, levels, chunk_size):
+        n = len(piece)
+        if window and total + n > chunk_size:
+            if chunk := "".join(window).strip():
+                chunks.append(chunk)
+            # Keep a tail of at most chunk_overlap chars that still fits with piece
+            while window and (total > chunk_overlap or total + n > chunk_size):
+                total -= len(window.popleft())
+        window.append(piece)
+        total += n
+    if chunk := "".join(window).strip():
+        chunks.append(chunk)
     return chunks
 
 
+def _interleave(pages: Iterable[str], separator: str) -> Iterator[str]:
+    """Yield pages with separator between consecutive ones (a lazy separator.join)."""
+    first = True
+    for page in pages:
+        if not first:
+            yield separator
+        first = False
+        yield page
+
+
 def chunk_document(
     text: str,
     strategy: str = "fixed_overlap",
@@ -103,13 +265,19 @@ def chunk_document(
           separators (paragraph, line, sentence, word). Use for general docs.
         - by_paragraph: Split by paragraphs, merging up to chunk_size. Use when
           paragraph boundaries matter (e.g. contracts, articles).
+        - recursive_regex: Split on regex levels (headings, list items, blank
+          lines, sentences, clauses, words), using a lower level only for
+          pieces still over chunk_size, then merge pieces with overlap. Use for
+          markdown or numbered-clause documents.
 
     Args:
         text: Raw document text.
-        strategy: One of "fixed_overlap", "by_paragraph".
+        strategy: One of "fixed_overlap", "by_paragraph", "recursive_regex".
         chunk_size: Max characters per chunk (default from config).
-        chunk_overlap: Overlap between chunks for fixed_overlap (default from config).
-        separators: Split priorities for fixed_overlap (default from config).
+        chunk_overlap: Overlap between chunks for fixed_overlap and recursive_regex
+            (default from config).
+        separators: Split priorities for fixed_overlap, or regex patterns for
+            recursive_regex (defaults from config).
         **kwargs: Ignored; allows future strategy options.
 
     Returns:
@@ -117,10 +285,50 @@ def chunk_document(
     """
     size = chunk_size if chunk_size is not None else config.CHUNK_SIZE
     overlap = chunk_overlap if chunk_overlap is not None else config.CHUNK_OVERLAP
-    seps = separators if separators is not None else config.CHUNK_SEPARATORS
 
+    # A text that fits in one chunk is that chunk for the window-based
+    # strategies (by_paragraph still normalizes blank lines, so it is excluded)
+    if len(text) <= size and strategy in ("fixed_overlap", "recursive_regex"):
+        stripped = text.strip()
+        return [stripped] if stripped else []
     if strategy == "fixed_overlap":
+        seps = separators if separators is not None else config.CHUNK_SEPARATORS
         return _chunk_fixed_overlap(text, size, overlap, seps)
     if strategy == "by_paragraph":
         return _chunk_by_paragraph(text, size)
+    if strategy == "recursive_regex":
+        seps = separators if separators is not None else config.CHUNK_REGEX_SEPARATORS
+        return _chunk_recursive_regex(text, size, overlap, seps)
+    raise ValueError(f"Unknown chunking strategy: {strategy}")
+
+
+def chunk_document_stream(
+    pages: Iterable[str],
+    strategy: str = "fixed_overlap",
+    chunk_size: int | None = None,
+    chunk_overlap: int | None = None,
+    separators: List[str] | None = None,
+    page_separator: str = "\n\n",
+    **kwargs: object,
+) -> Iterator[str]:
+    """
+    Chunk a document given as a stream of pages, without joining it first.
+
+    Yields exactly the chunks chunk_document(page_separator.join(pages), ...)
+    would return, while holding only about one page plus one chunk in memory.
+    recursive_regex splits top-down, so it joins the pages first. Arguments are
+    as for chunk_document.
+    """
+    size = chunk_size if chunk_size is not None else config.CHUNK_SIZE
+    overlap = chunk_overlap if chunk_overlap is not None else config.CHUNK_OVERLAP
+
+    pieces = _interleave(pages, page_separator)
+    if strategy == "fixed_overlap":
+        seps = separators if separators is not None else config.CHUNK_SEPARATORS
+        return _iter_fixed_overlap(pieces, size, overlap, seps)
+    if strategy == "by_paragraph":
+        return _group_paragraphs(_iter_paragraphs(pieces), size)
+    if strategy == "recursive_regex":
+        seps = separators if separators is not None else config.CHUNK_REGEX_SEPARATORS
+        return iter(_chunk_recursive_regex("".join(pieces), size, overlap, seps))
     raise ValueError(f"Unknown chunking strategy: {strategy}")
@@ -7,10 +7,64 @@ load_dotenv()
 # Chunking
 CHUNK_SIZE = int(os.getenv("CHUNK_SIZE", "512"))
 CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", "64"))
-CHUNK_SEPARATORS = ["\n\n", "\n", ". ", " ", ""]
+# No "" entry: when no separator fits, fixed_overlap already hard-cuts at chunk_size
+CHUNK_SEPARATORS = ["\n\n", "\n", ". ", " "]
+# recursive_regex levels, tried high to low: headings, list items, blank lines,
+# sentences, clauses, words. Each match marks where a new piece begins, so
+# trailing punctuation stays with the text before it. With a capture group, the
+# piece begins at group 1 and the text before it is context, like a lookbehind.
+# Leading with that literal lets re skip ahead to candidates (several times
+# faster on large documents than a lookbehind, which re checks at every offset).
+CHUNK_REGEX_SEPARATORS = [
+    r"\n(#{1,6}\s)",
+    r"\n(\s*\(?[A-Za-z0-9]{1,4}[.)]\s+)",
+    r"\n\n+",
+    r"[.!?](\s+)",
+    r",(\s+)",
+    r"\s+",
+]
+# Length of the per-chunk source preview shown in responses (sliced when serving)
+SOURCE_PREVIEW_CHARS = int(os.getenv("SOURCE_PREVIEW_CHARS", "500"))
+# Parent-document retrieval: when > 0, index CHUNK_SIZE children but return their
+# PARENT_CHUNK_SIZE parent chunks (deduplicated) as context; 0 disables
+PARENT_CHUNK_SIZE = int(os.getenv("PARENT_CHUNK_SIZE", "0"))
+
+# Ingestion
+INGEST_N_THREADS = int(os.getenv("INGEST_N_THREADS", str(max(1, (os.cpu_count() or 2) - 1))))
+# Processes for PDF page extraction: one pool, shared by all files and concurrent ingests
+PDF_N_WORKERS = int(os.getenv("PDF_N_WORKERS", str(os.cpu_count() or 1)))
+PDF_MIN_PAGES_PER_WORKER = int(os.getenv("PDF_MIN_PAGES_PER_WORKER", "64"))
+
+# Embedding
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "256"))
+# Embedding requests in flight per ingest (1 = sequential). Each API ingest
+# worker runs its own, so up to API_INGEST_WORKERS x this hit the provider's rate limit.
+EMBED_CONCURRENCY = int(os.getenv("EMBED_CONCURRENCY", "8"))
+
+# Vector index: "flat" (exact, float32), "sq8" (8-bit scalar quantized, 4x smaller),
+# or "ivf_pqfs" (IVF + 4-bit PQ fast-scan with exact re-rank; for large corpora)
+VECTOR_INDEX = os.getenv("VECTOR_INDEX", "flat")
 
 # Retrieval
 RETRIEVAL_TOP_K = int(os.getenv("RETRIEVAL_TOP_K", "4"))
+# Per-vector-store LRU of (query, top_k) -> chunks; 0 disables
+RETRIEVAL_CACHE_SIZE = int(os.getenv("RETRIEVAL_CACHE_SIZE", "256"))
+
+# Q&A semantic cache (API): reuse answers for questions this similar (cosine).
+# Off by default (QA_CACHE_SIZE=0): on contracts, questions that differ in one
+# key word ("termination" vs "renewal notice period") can embed above 0.92,
+# so enable it only with a strict threshold tested on your own questions.
+QA_CACHE_THRESHOLD = float(os.getenv("QA_CACHE_THRESHOLD", "0.98"))
+QA_CACHE_SIZE = int(os.getenv("QA_CACHE_SIZE", "0"))
+QA_CACHE_TTL = float(os.getenv("QA_CACHE_TTL", "3600"))
+
+# Q&A model routing: short factual lookups ("What is the total contract value?")
+# go to QA_SIMPLE_MODEL with a QA_SIMPLE_MAX_TOKENS answer budget, falling back to
+# the regular model when its answer would need review; empty (or the regular
+# model) disables routing. On Azure it names a deployment.
+QA_SIMPLE_MODEL = os.getenv("QA_SIMPLE_MODEL", "")
+QA_SIMPLE_MAX_TOKENS = int(os.getenv("QA_SIMPLE_MAX_TOKENS", "128"))
+QA_SIMPLE_MAX_CHARS = int(os.getenv("QA_SIMPLE_MAX_CHARS", "120"))
 
 # Human-review gates
 GATE_CONFIDENCE_THRESHOLD = float(os.getenv("GATE_CONFIDENCE_THRESHOLD", "0.7"))
@@ -19,6 +73,19 @@ GATE_MIN_CHUNKS = int(os.getenv("GATE_MIN_CHUNKS", "1"))
 # LLM
 LLM_PROVIDER = os.getenv("LLM_PROVIDER", "openai")
 
+# API: max extract/Q&A requests running at once; the rest wait their turn
+MAX_CONCURRENCY = int(os.getenv("MAX_CONCURRENCY", "8"))
+# API: worker threads per endpoint group, so slow ingests never queue ahead of Q&A
+API_QA_WORKERS = int(os.getenv("API_QA_WORKERS", str(MAX_CONCURRENCY)))
+API_EXTRACT_WORKERS = int(os.getenv("API_EXTRACT_WORKERS", "4"))
+API_INGEST_WORKERS = int(os.getenv("API_INGEST_WORKERS", "2"))
+# API: ingested collections kept in memory; the least recently used is evicted
+MAX_COLLECTIONS = max(1, int(os.getenv("MAX_COLLECTIONS", "4")))
+# API: create LLM/embedding clients and open their connections at startup
+API_WARMUP = os.getenv("API_WARMUP", "1") == "1"
+# Seconds each warmup call may take (it runs in the background; requests are not held up)
+API_WARMUP_TIMEOUT = float(os.getenv("API_WARMUP_TIMEOUT", "5"))
+
 # Azure OpenAI (when LLM_PROVIDER=azure)
 AZURE_OPENAI_ENDPOINT = os.getenv("AZURE_OPENAI_ENDPOINT", "")
 AZURE_OPENAI_API_KEY = os.getenv("AZURE_OPENAI_API_KEY", "")
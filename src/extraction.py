@@ -1,19 +1,22 @@
 """Document extraction workflow: retrieve, prompt LLM for structured data, apply gate."""
 from __future__ import annotations
 
+import io
 import json
 import re
-from typing import Any, List, Type
+from functools import lru_cache
+from typing import Any, Callable, List, Type
 
 from langchain_core.documents import Document
 from langchain_core.language_models import BaseChatModel
-from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
 from langchain_core.vectorstores import VectorStore
 from pydantic import BaseModel, Field, ValidationError
 
 from . import config
 from .gates import extraction_needs_review
-from .retrieval import retrieve
+from .retrieval import aretrieve, retrieve
+from .streaming import TokenForwarder
 
 
 class DefaultExtractionSchema(BaseModel):
@@ -33,18 +36,30 @@ For each field you are uncertain about, include an "uncertain_fields" array list
 If a field is missing or unclear, use null for its value and add it to "uncertain_fields".
 Include "terms" for key contractual terms such as obligations, warranties, termination, and other important clauses."""
 
-EXTRACTION_USER_TEMPLATE = """Context (chunks from the document):
-
-{context}
-
-Extract the following fields into a JSON object. Use the exact field names. Add an "uncertain_fields" array if any value is uncertain.
+# Static instructions and schema come first, retrieved context last, so the
+# prompt prefix is identical across calls and eligible for provider prompt caching.
+EXTRACTION_USER_TEMPLATE = """Extract the following fields into a JSON object. Use the exact field names. Add an "uncertain_fields" array if any value is uncertain.
 
 Schema / fields:
 {schema_desc}
 
-Output only one JSON object with the field names as keys and "uncertain_fields" as an optional array of strings."""
+Output only one JSON object with the field names as keys and "uncertain_fields" as an optional array of strings.
+
+Context (chunks from the document):
+
+{context}"""
+
+
+_SYSTEM_MSG = SystemMessage(content=EXTRACTION_SYSTEM)
+
 
+@lru_cache(maxsize=32)
+def _schema_query(schema: Type[BaseModel]) -> str:
+    """Default retrieval query for a schema: its field names."""
+    return " ".join(schema.model_fields.keys())
 
+
+@lru_cache(maxsize=32)
 def _schema_description(schema: Type[BaseModel]) -> str:
     """Produce a short description of the Pydantic model for the prompt."""
     lines = []
@@ -54,29 +69,48 @@ def _schema_description(schema: Type[BaseModel]) -> str:
     return "\n".join(lines) if lines else schema.model_json_schema().get("properties", {}).__str__()
 
 
+@lru_cache(maxsize=32)
+def _prompt_prefix(template: str, schema: Type[BaseModel]) -> str:
+    """Render everything before {context} in template for schema (context must come last)."""
+    return template.format(schema_desc=_schema_description(schema), context="")
+
+
 def _format_context(chunks: List[Document]) -> str:
-    parts = []
+    # Written straight into one buffer instead of a list of per-chunk strings
+    buf = io.StringIO()
     for i, doc in enumerate(chunks, 1):
-        parts.append(f"[Chunk {i}]\n{doc.page_content}")
-    return "\n\n".join(parts)
+        if i > 1:
+            buf.write("\n\n")
+        buf.write(f"[Chunk {i}]\n")
+        buf.write(doc.page_content)
+    return buf.getvalue()
 
 
-def _parse_extraction_response(content: str, schema: Type[BaseModel]) -> tuple[dict[str, Any], List[str]]:
-    """Parse LLM JSON response and return (record, uncertain_fields)."""
-    content = content.strip()
-    # Try to find a JSON object in the response
+_DECODER = json.JSONDecoder()
+
+
+def _extract_json_object(content: str) -> dict[str, Any] | None:
+    """Return the first JSON object in an LLM response, or None if there is none.
+
+    raw_decode parses in place from each "{" and stops at the matching brace,
+    so prose or a second object after the JSON does not break parsing.
+    """
     start = content.find("{")
-    if start == -1:
-        return {}, ["parse_error"]
-    end = content.rfind("}") + 1
-    if end <= start:
-        return {}, ["parse_error"]
-    json_str = content[start:end]
-    try:
-        data = json.loads(json_str)
-    except json.JSONDecodeError:
-        return {}, ["parse_error"]
+    while start != -1:
+        try:
+            data, _ = _DECODER.raw_decode(content, start)
+        except json.JSONDecodeError:
+            # A stray brace in leading prose; try the next one
+            start = content.find("{", start + 1)
+            continue
+        if isinstance(data, dict):
+            return data
+        start = content.find("{", start + 1)
+    return None
+
 
+def _record_from_data(data: dict[str, Any], schema: Type[BaseModel]) -> tuple[dict[str, Any], List[str]]:
+    """Split parsed JSON into (record restricted to schema fields, uncertain_fields)."""
     uncertain = list(data.pop("uncertain_fields", [])) if isinstance(data.get("uncertain_fields"), list) else []
     # Build record with only schema fields
     record = {}
@@ -85,6 +119,14 @@ def _parse_extraction_response(content: str, schema: Type[BaseModel]) -> tuple[d
     return record, uncertain
 
 
+def _parse_extraction_response(content: str, schema: Type[BaseModel]) -> tuple[dict[str, Any], List[str]]:
+    """Parse LLM JSON response and return (record, uncertain_fields)."""
+    data = _extract_json_object(content)
+    if data is None:
+        return {}, ["parse_error"]
+    return _record_from_data(data, schema)
+
+
 def _validate_record(record: dict[str, Any], schema: Type[BaseModel]) -> List[str]:
     """Validate record against schema; return list of validation error messages."""
     try:
@@ -123,17 +165,138 @@ def run_extraction(
         }
     """
     if query is None:
-        query = " ".join(schema.model_fields.keys())
+        query = _schema_query(schema)
     chunks = retrieve(vector_store, query, top_k=top_k)
-    context = _format_context(chunks)
-    schema_desc = _schema_description(schema)
-
-    user_msg = EXTRACTION_USER_TEMPLATE.format(context=context, schema_desc=schema_desc)
-    messages = [
-        SystemMessage(content=EXTRACTION_SYSTEM),
-        HumanMessage(content=user_msg),
-    ]
-    response = llm.invoke(messages)
+    response = llm.invoke(_extraction_messages(schema, chunks))
+    return _extraction_result(response, schema, chunks)
+
+
+async def arun_extraction(
+    vector_store: VectorStore,
+    schema: Type[BaseModel],
+    llm: BaseChatModel,
+    query: str | None = None,
+    top_k: int | None = None,
+    on_field: Callable[[str, Any], None] | None = None,
+    **kwargs: Any,
+) -> dict[str, Any]:
+    """Async run_extraction(): same arguments and result, awaiting the LLM with ainvoke.
+
+    on_field(name, value): called for each schema field as soon as its JSON
+    value is complete in the streamed response (needs a streaming LLM, e.g.
+    ChatOpenAI(streaming=True); otherwise all fields arrive once the response
+    does). Values are raw JSON; the returned record is validated as usual.
+    """
+    if query is None:
+        query = _schema_query(schema)
+    chunks = await aretrieve(vector_store, query, top_k=top_k)
+    messages = _extraction_messages(schema, chunks)
+    if on_field is None:
+        response = await llm.ainvoke(messages)
+    else:
+        fields = _JsonFieldStream(on_field, schema.model_fields.keys())
+        tokens = TokenForwarder(fields.feed)
+        response = await llm.ainvoke(messages, config={"callbacks": [tokens]})
+        if not tokens.streamed:
+            fields.feed(getattr(response, "content", str(response)))
+    return _extraction_result(response, schema, chunks)
+
+
+class _JsonFieldStream:
+    """
+    Emits the top-level (key, value) pairs of a JSON object while it streams in.
+
+    feed() takes text chunks; each value is handed to on_field once raw_decode
+    can parse it completely. Parsing resumes where the last complete pair
+    ended, so each call only looks at the unparsed tail. A "{" that turns out
+    not to open a JSON object (e.g. in leading prose) is skipped for the next
+    one, as _extract_json_object does.
+    """
+
+    def __init__(self, on_field: Callable[[str, Any], None], names: Any) -> None:
+        self.on_field = on_field
+        self.names = frozenset(names)
+        self.buf = ""
+        self.start = -1  # index of the "{" being parsed
+        self.pos = -1  # index just past the last consumed pair; -1 until "{" is seen
+        self.search_from = 0  # where to look for the next "{"
+        self.done = False
+
+    def feed(self, text: str) -> None:
+        self.buf += text
+        while not self.done:
+            if self.pos < 0:
+                start = self.buf.find("{", self.search_from)
+                if start < 0:
+                    self.search_from = len(self.buf)
+                    return
+                self.start, self.pos = start, start + 1
+            parsed = self._next_pair()
+            if parsed is None:
+                return  # wait for more text
+            if not parsed:
+                # Not an object after all: re-anchor at the next "{"
+                self.search_from, self.pos = self.start + 1, -1
+
+    def _skip(self, i: int, chars: str) -> int:
+        while i < len(self.buf) and self.buf[i] in chars:
+            i += 1
+        return i
+
+    def _next_pair(self) -> bool | None:
+        """Consume one complete key/value pair.
+
+        Returns True on success, None if more text is needed (or the object
+        ended: self.done), and False if the text at self.start is not a JSON object.
+        """
+        buf = self.buf
+        i = self._skip(self.pos, " \t\r\n,")
+        if i >= len(buf):
+            return None
+        if buf[i] == "}":
+            self.done = True
+            return None
+        if buf[i] != '"':
+            return False
+        try:
+            key, i = _DECODER.raw_decode(buf, i)
+        except json.JSONDecodeError as e:
+            return _incomplete(e, buf)
+        i = self._skip(i, " \t\r\n")
+        if i >= len(buf):
+            return None
+        if buf[i] != ":":
+            return False
+        i = self._skip(i + 1, " \t\r\n")
+        if i >= len(buf):
+            return None
+        try:
+            value, end = _DECODER.raw_decode(buf, i)
+        except json.JSONDecodeError as e:
+            return _incomplete(e, buf)
+        # A number (or true/null) at the very end may still be growing: "12" of "125"
+        if end >= len(buf):
+            return None
+        self.pos = end
+        if key in self.names:
+            self.on_field(key, value)
+        return True
+
+
+def _incomplete(error: json.JSONDecodeError, buf: str) -> None | bool:
+    """None if the decode failed only because buf ends mid-value, else False."""
+    if error.pos >= len(buf) or error.msg.startswith("Unterminated string"):
+        return None
+    return False
+
+
+def _extraction_messages(schema: Type[BaseModel], chunks: List[Document]) -> List[BaseMessage]:
+    user_msg = _prompt_prefix(EXTRACTION_USER_TEMPLATE, schema) + _format_context(chunks)
+    return [_SYSTEM_MSG, HumanMessage(content=user_msg)]
+
+
+def _extraction_result(response: Any, schema: Type[BaseModel], chunks: List[Document]) -> dict[str, Any]:
+    """Parse, validate and gate the LLM response (shared by run_extraction and arun_extraction)."""
     content = getattr(response, "content", str(response))
     record, uncertain = _parse_extraction_response(content, schema)
     validation_errors = _validate_record(record, schema)
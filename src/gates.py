@@ -18,6 +18,9 @@ QA_UNCERTAIN_PHRASES = (
     r"cannot\s+be\s+determined",
 )
 
+# One case-insensitive alternation: a single scan of the answer, no lowered copy
+_UNCERTAIN_RE = re.compile("|".join(f"(?:{p})" for p in QA_UNCERTAIN_PHRASES), re.IGNORECASE)
+
 
 def qa_needs_review(
     answer: str,
@@ -45,10 +48,8 @@ def qa_needs_review(
     if confidence is not None and confidence < threshold:
         return True, "low_confidence"
 
-    answer_lower = (answer or "").strip().lower()
-    for pattern in QA_UNCERTAIN_PHRASES:
-        if re.search(pattern, answer_lower):
-            return True, "uncertain_phrasing"
+    if _UNCERTAIN_RE.search(answer or ""):
+        return True, "uncertain_phrasing"
 
     return False, "ok"
 
@@ -1,18 +1,52 @@
 """Document ingestion: load, chunk, embed, and store in vector DB."""
 from __future__ import annotations
 
+import codecs
+import hashlib
+import io
+import mmap
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+import uuid
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
 from pathlib import Path
-from typing import TYPE_CHECKING, Callable, List
+from typing import TYPE_CHECKING, Any, BinaryIO, Callable, Dict, Iterable, Iterator, List, Tuple, Union
 
+import numpy as np
 from langchain_core.documents import Document
+from langchain_community.docstore.in_memory import InMemoryDocstore
 from langchain_community.vectorstores import FAISS
 
 from . import config
 
 if TYPE_CHECKING:
+    import faiss
+    from langchain_core.embeddings import Embeddings
     from langchain_core.vectorstores import VectorStore
-from .llm_factory import get_embeddings
-from .chunking import chunk_document
+from .llm_factory import embedding_target, get_embeddings
+from .chunking import chunk_document, chunk_document_stream
+from .pdf_pages import extract_pages
+
+# Joins PDF page texts into one document text
+PAGE_SEPARATOR = "\n\n"
+# .txt files at least this large are decoded from an mmap block by block
+_MMAP_MIN_BYTES = 1 << 20
+_MMAP_BLOCK_BYTES = 1 << 20
+
+# Process pool for PDF page extraction, shared by every file and every ingest
+# (created on first use), so concurrent PDFs never run more than PDF_N_WORKERS
+# processes between them
+_pdf_pool: ProcessPoolExecutor | None = None
+_pdf_pool_lock = threading.Lock()
+
+# A file path, or an in-memory upload as (filename, content)
+DocumentSource = Union[str, Path, Tuple[str, Union[bytes, BinaryIO]]]
 
 
 def _load_text_file(path: Path) -> str:
@@ -20,41 +54,452 @@ def _load_text_file(path: Path) -> str:
         return f.read()
 
 
-def _load_pdf(path: Path) -> str:
+def _decode_blocks(blocks: Iterable[bytes | memoryview]) -> Iterator[str]:
+    """Decode UTF-8 blocks with universal newlines, as text-mode open() reads a file."""
+    decoder = io.IncrementalNewlineDecoder(
+        codecs.getincrementaldecoder("utf-8")(errors="replace"), translate=True
+    )
+    for block in blocks:
+        if text := decoder.decode(block):
+            yield text
+    if text := decoder.decode(b"", final=True):
+        yield text
+
+
+def _iter_blocks(view: memoryview) -> Iterator[memoryview]:
+    for offset in range(0, len(view), _MMAP_BLOCK_BYTES):
+        yield view[offset : offset + _MMAP_BLOCK_BYTES]
+
+
+def _iter_text_file(path: Path) -> Iterator[str]:
+    """Yield the text of a .txt file in pieces that concatenate to _load_text_file(path)."""
+    if path.stat().st_size < _MMAP_MIN_BYTES:
+        yield _load_text_file(path)
+        return
+    # Decode straight from the page cache; only one block of text is alive at
+    # a time instead of the whole file as one str.
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        with memoryview(mm) as view:
+            yield from _decode_blocks(_iter_blocks(view))
+
+
+def _iter_text_upload(data: bytes | BinaryIO) -> Iterator[str]:
+    """Yield in-memory .txt content in pieces, decoded the way _iter_text_file reads a path."""
+    if isinstance(data, bytes):
+        with memoryview(data) as view:
+            yield from _decode_blocks(_iter_blocks(view))
+        return
+    # Spooled uploads are read a block at a time instead of into one bytes object
+    yield from _decode_blocks(iter(partial(data.read, _MMAP_BLOCK_BYTES), b""))
+
+
+def _get_pdf_pool() -> ProcessPoolExecutor:
+    global _pdf_pool
+    with _pdf_pool_lock:
+        if _pdf_pool is None:
+            _pdf_pool = ProcessPoolExecutor(
+                max_workers=max(1, config.PDF_N_WORKERS),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pdf_pool
+
+
+def _discard_pdf_pool(pool: ProcessPoolExecutor) -> None:
+    """Drop a broken pool so the next large PDF starts a fresh one."""
+    global _pdf_pool
+    with _pdf_pool_lock:
+        if _pdf_pool is pool:
+            _pdf_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _iter_pdf_pages(source: Path | bytes | BinaryIO) -> Iterator[str]:
+    """Yield the text of each PDF page in order."""
     from pypdf import PdfReader
-    reader = PdfReader(path)
-    return "\n\n".join(page.extract_text() or "" for page in reader.pages)
+    reader = PdfReader(io.BytesIO(source) if isinstance(source, bytes) else source)
+    n_pages = len(reader.pages)
+    workers = min(config.PDF_N_WORKERS, n_pages // max(config.PDF_MIN_PAGES_PER_WORKER, 1))
+    if workers <= 1:
+        for page in reader.pages:
+            yield page.extract_text() or ""
+        return
+
+    # Large PDFs: parse contiguous page ranges in worker processes (pypdf text
+    # extraction is pure Python, so threads would serialize on the GIL).
+    # Workers open the PDF by path: passing its bytes would pickle a copy to
+    # each of them. In-memory uploads are written to one temp file first.
+    with tempfile.TemporaryDirectory(prefix="ingest_pdf_") as tmp:
+        path = source if isinstance(source, Path) else _spill_upload(source, Path(tmp) / "upload.pdf")
+        step = -(-n_pages // workers)
+        starts = range(0, n_pages, step)
+        stops = [min(start + step, n_pages) for start in starts]
+        pool = _get_pdf_pool()
+        try:
+            ranges = list(pool.map(extract_pages, [str(path)] * len(stops), starts, stops))
+        except BrokenProcessPool:
+            # Workers could not start (e.g. the caller's __main__ is not import-safe)
+            _discard_pdf_pool(pool)
+            ranges = None
+    if ranges is None:
+        for page in reader.pages:
+            yield page.extract_text() or ""
+        return
+    for page_texts in ranges:
+        yield from page_texts
+
+
+def _spill_upload(data: bytes | BinaryIO, path: Path) -> Path:
+    """Write an in-memory upload to path, copying file objects a block at a time."""
+    with open(path, "wb") as f:
+        if isinstance(data, bytes):
+            f.write(data)
+        else:
+            data.seek(0)
+            shutil.copyfileobj(data, f, _MMAP_BLOCK_BYTES)
+    return path
+
+
+def _source_name(source: DocumentSource) -> str:
+    return Path(source[0] if isinstance(source, tuple) else source).name
 
 
-def load_document(path: str | Path) -> str:
-    """Load document text from a file (supports .txt and .pdf)."""
-    path = Path(path)
+def _iter_pdf_text(source: Path | bytes | BinaryIO) -> Iterator[str]:
+    """Yield PDF pages with PAGE_SEPARATOR between them."""
+    for i, page in enumerate(_iter_pdf_pages(source)):
+        if i:
+            yield PAGE_SEPARATOR
+        yield page
+
+
+def _iter_document_text(source: DocumentSource) -> Iterator[str]:
+    """Yield document text in pieces (PDF pages, .txt blocks); "".join gives load_document."""
+    if isinstance(source, tuple):
+        name, data = source
+        suffix = Path(name).suffix.lower()
+        if suffix == ".txt":
+            yield from _iter_text_upload(data)
+            return
+        if suffix == ".pdf":
+            yield from _iter_pdf_text(data)
+            return
+        raise ValueError(f"Unsupported file type: {suffix}. Use .txt or .pdf.")
+
+    path = Path(source)
     if not path.exists():
         raise FileNotFoundError(str(path))
     suffix = path.suffix.lower()
     if suffix == ".txt":
-        return _load_text_file(path)
+        yield from _iter_text_file(path)
+        return
     if suffix == ".pdf":
-        return _load_pdf(path)
+        yield from _iter_pdf_text(path)
+        return
     raise ValueError(f"Unsupported file type: {suffix}. Use .txt or .pdf.")
 
 
+def load_document(source: DocumentSource) -> str:
+    """
+    Load document text (supports .txt and .pdf).
+
+    source is a file path, or a (filename, bytes | binary file) pair for
+    uploads held in memory; the filename only decides the file type.
+    """
+    return "".join(_iter_document_text(source))
+
+
+def _load_and_chunk(
+    source: DocumentSource,
+    chunk_strategy: str,
+    chunk_size: int,
+    chunk_overlap: int,
+) -> List[str]:
+    """Load and chunk one document; runs in an ingest worker thread.
+
+    PDF pages and large .txt blocks are chunked as they are read, so the full
+    document text is never joined into one string (same chunks as
+    chunk_document(load_document(...))).
+    """
+    return list(
+        chunk_document_stream(
+            _iter_document_text(source),
+            strategy=chunk_strategy,
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+            page_separator="",
+        )
+    )
+
+
+def _load_and_chunk_parents(
+    source: DocumentSource,
+    chunk_strategy: str,
+    chunk_size: int,
+    chunk_overlap: int,
+    parent_chunk_size: int,
+) -> List[Tuple[str, List[str]]]:
+    """Load one document into parent chunks, each paired with its (smaller) child chunks."""
+    parents = _load_and_chunk(source, chunk_strategy, parent_chunk_size, chunk_overlap)
+    return [
+        (
+            parent,
+            chunk_document(
+                parent,
+                strategy=chunk_strategy,
+                chunk_size=chunk_size,
+                chunk_overlap=chunk_overlap,
+            ),
+        )
+        for parent in parents
+    ]
+
+
+def _chunk_document(text: str, source: str, index: int, **metadata: Any) -> Document:
+    """Wrap chunk text in a Document with the standard ingest metadata."""
+    return Document(
+        page_content=text,
+        metadata={
+            "source": source,
+            "chunk_index": index,
+            **metadata,
+        },
+    )
+
+
+def _embed_in_batches(
+    texts: List[str],
+    embeddings: "Embeddings",
+    batch_size: int,
+    concurrency: int = 1,
+    on_batch: Callable[[int, int], None] | None = None,
+) -> np.ndarray:
+    """Embed texts batch_size at a time; returns a float32 (n, dim) matrix.
+
+    Up to concurrency batch requests are in flight at once on worker threads
+    (the calls are network-bound, so the GIL is released while waiting). Each
+    batch is copied into one preallocated matrix as it arrives, so only the
+    in-flight batches are ever held as Python float lists (~8x the size of float32).
+    on_batch(done, total) is called on the calling thread after each batch is stored.
+    """
+    batch_size = max(1, batch_size)
+    starts = range(0, len(texts), batch_size)
+    vectors: np.ndarray | None = None
+
+    def embed(start: int) -> np.ndarray:
+        return np.asarray(embeddings.embed_documents(texts[start : start + batch_size]), dtype=np.float32)
+
+    workers = max(1, min(concurrency, len(starts)))
+    n_done = 0
+
+    def store_next() -> None:
+        nonlocal vectors, n_done
+        vectors = _store_batch(vectors, len(texts), *pending.popleft())
+        n_done += 1
+        if on_batch:
+            on_batch(n_done, len(starts))
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="embed") as pool:
+        # Submit at most workers batches ahead of the one being copied
+        pending: deque = deque()
+        for start in starts:
+            pending.append((start, pool.submit(embed, start)))
+            if len(pending) >= workers:
+                store_next()
+        while pending:
+            store_next()
+    return vectors if vectors is not None else np.empty((0, 0), dtype=np.float32)
+
+
+def _store_batch(vectors: np.ndarray | None, n: int, start: int, future: "Future[np.ndarray]") -> np.ndarray:
+    """Copy a finished batch into vectors at start, allocating the (n, dim) matrix on first use."""
+    batch = future.result()
+    if vectors is None:
+        vectors = np.empty((n, batch.shape[1]), dtype=np.float32)
+    vectors[start : start + len(batch)] = batch
+    return vectors
+
+
+DEFAULT_EMBEDDING_MODEL = "text-embedding-3-small"
+
+_IVF_MIN_VECTORS = 5000
+_IVF_RERANK_FACTOR = 16
+
+
+def _build_index(vectors: np.ndarray, index_type: str) -> "faiss.Index":
+    """Build a FAISS index of the given type over vectors."""
+    import faiss
+
+    dim = vectors.shape[1]
+    if index_type == "ivf_pqfs" and len(vectors) < _IVF_MIN_VECTORS:
+        # Too few vectors to train coarse centroids; exact search is faster anyway
+        index_type = "flat"
+
+    if index_type == "flat":
+        index = faiss.IndexFlatL2(dim)
+    elif index_type == "sq8":
+        # 8-bit scalar quantization: 4x less memory than float32. Per-dimension
+        # ranges are trained on the vectors here and stored in the index, so
+        # queries need no extra dequantization step.
+        index = faiss.IndexScalarQuantizer(dim, faiss.ScalarQuantizer.QT_8bit, faiss.METRIC_L2)
+        index.train(vectors)
+    elif index_type == "ivf_pqfs":
+        # IVF with 4-bit product-quantization fast-scan codes (SIMD lookup-table
+        # scans), wrapped in a refine stage that keeps float32 vectors and
+        # exactly re-ranks the top k * k_factor candidates.
+        nlist = min(1024, len(vectors) // 39)
+        # Sub-quantizers must divide dim; an odd dim falls back to a single one
+        n_subquantizers = next((m for m in (64, 32, 16, 8, 4, 2) if dim % m == 0), 1)
+        index = faiss.index_factory(dim, f"IVF{nlist},PQ{n_subquantizers}x4fs,RFlat")
+        index.train(vectors)
+        index.k_factor = _IVF_RERANK_FACTOR
+        faiss.extract_index_ivf(index).nprobe = max(1, nlist // 16)
+    else:
+        raise ValueError(f"Unknown vector index type: {index_type}")
+    index.add(vectors)
+    return index
+
+
+def _build_vector_store(
+    documents: List[Document],
+    vectors: np.ndarray,
+    embeddings: "Embeddings",
+    index_type: str,
+    parents: Dict[str, Document] | None = None,
+) -> FAISS:
+    """Wrap a freshly built FAISS index and its documents in a LangChain store.
+
+    parents (parent_id -> Document) go into the docstore alongside the indexed
+    documents but get no vectors; see retrieval.retrieve.
+    """
+    ids = [str(uuid.uuid4()) for _ in documents]
+    docs = dict(parents or {})
+    docs.update(zip(ids, documents))
+    return FAISS(
+        embedding_function=embeddings,
+        index=_build_index(vectors, index_type),
+        docstore=InMemoryDocstore(docs),
+        index_to_docstore_id=dict(enumerate(ids)),
+    )
+
+
+# Bump when the stored chunk/metadata layout changes, so old caches are ignored
+_PERSIST_FORMAT = 3
+_PERSIST_INDEX_NAME = "index"
+_HASH_BLOCK_BYTES = 1 << 20
+
+
+def _source_digest(source: DocumentSource) -> bytes:
+    """sha256 of a source's raw bytes, read in blocks (uploads are rewound afterwards)."""
+    h = hashlib.sha256()
+    if isinstance(source, tuple):
+        data = source[1]
+        if isinstance(data, bytes):
+            h.update(data)
+            return h.digest()
+        pos = data.tell()
+        for block in iter(partial(data.read, _HASH_BLOCK_BYTES), b""):
+            h.update(block)
+        data.seek(pos)
+        return h.digest()
+    path = Path(source)
+    if not path.exists():
+        raise FileNotFoundError(str(path))
+    with open(path, "rb") as f:
+        for block in iter(partial(f.read, _HASH_BLOCK_BYTES), b""):
+            h.update(block)
+    return h.digest()
+
+
+def _persist_key(paths: List[DocumentSource], names: List[str], settings: Tuple[Any, ...]) -> str:
+    """Cache key covering every input byte, display name and setting that shapes the store."""
+    h = hashlib.sha256(repr((_PERSIST_FORMAT, settings)).encode("utf-8"))
+    for source, name in zip(paths, names):
+        h.update(name.encode("utf-8") + b"\0")
+        h.update(_source_digest(source))
+    return h.hexdigest()[:32]
+
+
+def _load_persisted(persist_path: Path, embeddings: "Embeddings") -> FAISS | None:
+    """Load a stored vector store, or None if it is missing or unreadable (then it is rebuilt)."""
+    if not persist_path.is_dir():
+        return None
+    try:
+        return FAISS.load_local(
+            str(persist_path),
+            embeddings,
+            index_name=_PERSIST_INDEX_NAME,
+            allow_dangerous_deserialization=True,
+        )
+    except Exception:
+        # Torn or foreign files (e.g. written before saves were atomic); the
+        # rebuilt store replaces them in _save_persisted
+        return None
+
+
+def _save_persisted(vector_store: FAISS, persist_path: Path) -> None:
+    """Save vector_store to persist_path atomically: readers see the old entry or the whole new one.
+
+    The files are written to a sibling temp directory and renamed into place,
+    so a crash mid-write or a concurrent writer (pytest-xdist workers sharing
+    a key) never leaves a half-written index under the final name.
+    """
+    tmp_path = persist_path.with_name(f".{persist_path.name}.{uuid.uuid4().hex}.tmp")
+    vector_store.save_local(str(tmp_path), index_name=_PERSIST_INDEX_NAME)
+    try:
+        os.replace(tmp_path, persist_path)
+        return
+    except OSError:
+        # A directory is already there (another writer, or an unreadable
+        # entry): move it aside, then put ours in its place
+        pass
+    stale_path = persist_path.with_name(f".{persist_path.name}.{uuid.uuid4().hex}.stale")
+    try:
+        os.replace(persist_path, stale_path)
+    except FileNotFoundError:
+        pass
+    try:
+        os.replace(tmp_path, persist_path)
+    except OSError:
+        # Lost a race to another writer; the key covers all inputs, so its copy is equivalent
+        shutil.rmtree(tmp_path, ignore_errors=True)
+    shutil.rmtree(stale_path, ignore_errors=True)
+
+
 def ingest_documents(
-    paths: List[str | Path],
+    paths: List[DocumentSource],
     chunk_strategy: str = "fixed_overlap",
     chunk_size: int | None = None,
     chunk_overlap: int | None = None,
-    embedding_model: str = "text-embedding-3-small",
+    embedding_model: str = DEFAULT_EMBEDDING_MODEL,
     persist_directory: str | None = None,
     collection_name: str = "rag_prototype",
     progress_callback: Callable[[str, float], None] | None = None,
     file_display_names: List[str] | None = None,
+    batch_size: int | None = None,
+    concurrent_embeddings: int | None = None,
+    index_type: str | None = None,
 ) -> "VectorStore":
     """
     Load documents from paths, chunk them, embed, and store in FAISS.
 
+    paths: file paths and/or (filename, bytes | binary file) pairs; pairs let
+    callers ingest uploads without writing them to a temp file first.
+
     progress_callback(message, progress) is called with progress in 0.0–1.0.
     file_display_names: optional names to show in progress (e.g. original upload names).
+    batch_size: chunks per embedding request (default from config).
+    concurrent_embeddings: embedding requests kept in flight at once (1 = sequential;
+    default config.EMBED_CONCURRENCY).
+    index_type: FAISS index, "flat", "sq8" (int8 codes, 4x smaller) or
+    "ivf_pqfs" (default config.VECTOR_INDEX).
+    persist_directory: if set, the finished store is saved under
+    persist_directory/<key>/, where key hashes the input bytes, names and
+    ingest settings; a later call with the same key loads it instead of
+    re-chunking and re-embedding. Saves are atomic, and an unreadable entry
+    is rebuilt. Only point it at a directory you control (the docstore is
+    pickled).
+    With config.PARENT_CHUNK_SIZE > 0, documents are first split into parent
+    chunks of that size; only their child chunks (chunk_size) are embedded, and
+    each child carries a "parent_id" that retrieval resolves to the full parent.
     Returns the FAISS vector store (in-memory; no sqlite, works on Azure App Service).
     """
     def report(msg: str, p: float) -> None:
@@ -63,37 +508,104 @@ def ingest_documents(
 
     size = chunk_size if chunk_size is not None else config.CHUNK_SIZE
     overlap = chunk_overlap if chunk_overlap is not None else config.CHUNK_OVERLAP
+    index_type = index_type or config.VECTOR_INDEX
     display_names = file_display_names if file_display_names and len(file_display_names) == len(paths) else None
 
     all_chunks: List[Document] = []
+    parents: Dict[str, Document] = {}
     n_paths = len(paths)
-    for path_idx, path in enumerate(paths):
-        base_name = (display_names[path_idx] if display_names else None) or Path(path).name
-        report(f"Loading {base_name}…", (path_idx + 0.0) / max(n_paths, 1))
-        text = load_document(path)
-        report(f"Chunking {base_name}…", (path_idx + 0.5) / max(n_paths, 1))
-        chunks = chunk_document(
-            text,
-            strategy=chunk_strategy,
+    base_names = [
+        (display_names[path_idx] if display_names else None) or _source_name(path)
+        for path_idx, path in enumerate(paths)
+    ]
+    persist_path: Path | None = None
+    if persist_directory:
+        settings = (
+            chunk_strategy,
+            size,
+            overlap,
+            config.PARENT_CHUNK_SIZE,
+            config.CHUNK_SEPARATORS,
+            config.CHUNK_REGEX_SEPARATORS,
+            index_type,
+            # The endpoint and deployment on Azure, where embedding_model is only a label
+            embedding_target(embedding_model),
+        )
+        persist_path = Path(persist_directory) / _persist_key(paths, base_names, settings)
+        vector_store = _load_persisted(persist_path, get_embeddings(model=embedding_model))
+        if vector_store is not None:
+            report("Cache hit: loaded stored vectors, nothing to embed.", 1.0)
+            return vector_store
+
+    report(f"Loading {n_paths} file(s)…", 0.0)
+    # Files are loaded and chunked in parallel; the vector store is only written
+    # from this thread once all chunks are collected.
+    parent_size = config.PARENT_CHUNK_SIZE
+    if parent_size > 0:
+        load = partial(
+            _load_and_chunk_parents,
+            chunk_strategy=chunk_strategy,
             chunk_size=size,
             chunk_overlap=overlap,
+            parent_chunk_size=parent_size,
         )
-        for i, c in enumerate(chunks):
-            all_chunks.append(
-                Document(
-                    page_content=c,
-                    metadata={"source": base_name, "chunk_index": i},
-                )
-            )
+    else:
+        load = partial(_load_and_chunk, chunk_strategy=chunk_strategy, chunk_size=size, chunk_overlap=overlap)
+    workers = max(1, min(config.INGEST_N_THREADS, n_paths))
+    per_file: List[list | None] = [None] * n_paths
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ingest") as pool:
+        futures = {pool.submit(load, path): path_idx for path_idx, path in enumerate(paths)}
+        # Progress follows completion order so one large file does not stall it;
+        # callbacks stay on the calling thread (Streamlit requires that).
+        for n_done, future in enumerate(as_completed(futures), 1):
+            path_idx = futures[future]
+            per_file[path_idx] = future.result()
+            report(f"Chunked {base_names[path_idx]}…", 0.85 * n_done / max(n_paths, 1))
+
+    # Documents are built in input order, independent of completion order
+    for base_name, chunks in zip(base_names, per_file):
+        if parent_size <= 0:
+            all_chunks.extend(_chunk_document(c, base_name, i) for i, c in enumerate(chunks))
+            continue
+        child_idx = 0
+        for parent_idx, (parent, children) in enumerate(chunks):
+            parent_id = str(uuid.uuid4())
+            parents[parent_id] = _chunk_document(parent, base_name, parent_idx)
+            for c in children:
+                all_chunks.append(_chunk_document(c, base_name, child_idx, parent_id=parent_id))
+                child_idx += 1
 
     if not all_chunks:
         raise ValueError("No chunks produced from the given documents.")
 
-    report("Embedding and storing in vector DB…", 0.85)
+    cache_note = " (cache miss)" if persist_path is not None else ""
+    report(f"Embedding and storing in vector DB{cache_note}…", 0.85)
     embeddings = get_embeddings(model=embedding_model)
-    vector_store = FAISS.from_documents(
-        documents=all_chunks,
-        embedding=embeddings,
+    # Templated text (headers, disclaimers) repeats across files: embed each
+    # distinct chunk once and give every copy the same vector row.
+    rows_by_text: Dict[str, int] = {}
+    unique_texts: List[str] = []
+    rows: List[int] = []
+    for doc in all_chunks:
+        row = rows_by_text.setdefault(doc.page_content, len(unique_texts))
+        if row == len(unique_texts):
+            unique_texts.append(doc.page_content)
+        rows.append(row)
+    # Embed in length order so every batch (and every parallel request) carries
+    # a similar amount of text, then map each chunk back to its vector row.
+    by_length = sorted(range(len(unique_texts)), key=lambda i: len(unique_texts[i]))
+    sorted_vectors = _embed_in_batches(
+        [unique_texts[i] for i in by_length],
+        embeddings,
+        batch_size if batch_size is not None else config.EMBED_BATCH_SIZE,
+        concurrent_embeddings if concurrent_embeddings is not None else config.EMBED_CONCURRENCY,
+        on_batch=lambda done, total: report(f"Embedded batch {done}/{total}…", 0.85 + 0.13 * done / total),
     )
+    sorted_row = np.empty(len(by_length), dtype=np.intp)
+    sorted_row[by_length] = np.arange(len(by_length))
+    vectors = sorted_vectors[sorted_row[rows]]
+    vector_store = _build_vector_store(all_chunks, vectors, embeddings, index_type, parents)
+    if persist_path is not None:
+        _save_persisted(vector_store, persist_path)
     report("Done.", 1.0)
     return vector_store
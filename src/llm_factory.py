@@ -1,51 +1,149 @@
 """LLM and embedding factory: returns OpenAI or Azure implementations based on config."""
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+import os
+from functools import lru_cache
+from typing import TYPE_CHECKING, Tuple, Type
 
 from . import config
 
 if TYPE_CHECKING:
+    import httpx
     from langchain_core.embeddings import Embeddings
     from langchain_core.language_models import BaseChatModel
 
+# Idle connections are kept this long (httpx default: 5 s), so a user's next
+# question a few seconds later skips the TCP/TLS handshake
+_HTTP_KEEPALIVE_S = 60.0
+_DEFAULT_CHAT_MODEL = "gpt-4o-mini"
+_DEFAULT_EMBEDDING_MODEL = "text-embedding-3-small"
 
+
+def _use_azure() -> bool:
+    return config.LLM_PROVIDER.lower() == "azure"
+
+
+@lru_cache(maxsize=1)
+def _client_classes() -> Tuple[Type[BaseChatModel], Type[Embeddings]]:
+    """
+    Import the provider's chat and embeddings classes once.
+
+    langchain_openai stays a lazy import (it is slow to load, and only the
+    provider in use is needed); after the first call the factories skip the
+    import machinery entirely.
+    """
+    if _use_azure():
+        from langchain_openai import AzureChatOpenAI, AzureOpenAIEmbeddings
+        return AzureChatOpenAI, AzureOpenAIEmbeddings
+    from langchain_openai import ChatOpenAI, OpenAIEmbeddings
+    return ChatOpenAI, OpenAIEmbeddings
+
+
+@lru_cache(maxsize=1)
+def _http_client() -> httpx.Client | None:
+    """
+    One keep-alive connection pool shared by the sync chat and embeddings clients.
+
+    Without it, OpenAIEmbeddings and ChatOpenAI each open their own pool to
+    the same host. Returns None (library defaults) when OPENAI_PROXY is set,
+    since LangChain rejects an explicit client together with openai_proxy.
+    """
+    if os.getenv("OPENAI_PROXY"):
+        return None
+    import httpx
+    import openai
+
+    workers = config.API_QA_WORKERS + config.API_EXTRACT_WORKERS + config.API_INGEST_WORKERS
+    return openai.DefaultHttpxClient(
+        limits=httpx.Limits(
+            max_connections=1000,
+            max_keepalive_connections=max(100, workers),
+            keepalive_expiry=_HTTP_KEEPALIVE_S,
+        )
+    )
+
+
+@lru_cache(maxsize=8)
 def get_llm(
     model: str | None = None,
     temperature: float = 0,
+    max_tokens: int | None = None,
 ) -> BaseChatModel:
-    """Return LLM (OpenAI or Azure) based on LLM_PROVIDER."""
-    if config.LLM_PROVIDER.lower() == "azure":
-        from langchain_openai import AzureChatOpenAI
-        return AzureChatOpenAI(
+    """
+    Return LLM (OpenAI or Azure) based on LLM_PROVIDER.
+
+    Cached per (model, temperature, max_tokens) so callers share one client
+    and its HTTP connection pool instead of re-creating both on every
+    request. Keep the arguments primitive (hashable); a few combinations can
+    stay warm side by side. max_tokens caps the response length (None: no cap).
+    On Azure, model names the deployment (default: AZURE_OPENAI_DEPLOYMENT).
+    """
+    chat_class, _ = _client_classes()
+    if _use_azure():
+        deployment = model or config.AZURE_OPENAI_DEPLOYMENT
+        return chat_class(
             azure_endpoint=config.AZURE_OPENAI_ENDPOINT,
             api_key=config.AZURE_OPENAI_API_KEY,
             api_version="2024-02-15-preview",
-            azure_deployment=config.AZURE_OPENAI_DEPLOYMENT,
-            model=model or config.AZURE_OPENAI_DEPLOYMENT,
+            azure_deployment=deployment,
+            model=deployment,
             temperature=temperature,
+            max_tokens=max_tokens,
+            http_client=_http_client(),
         )
     # Default: OpenAI
-    from langchain_openai import ChatOpenAI
-    return ChatOpenAI(
-        model=model or "gpt-4o-mini",
+    return chat_class(
+        model=model or _DEFAULT_CHAT_MODEL,
         temperature=temperature,
+        max_tokens=max_tokens,
+        http_client=_http_client(),
     )
 
 
+def get_simple_llm() -> BaseChatModel | None:
+    """
+    Return the Q&A routing model for short factual questions, or None if routing is off.
+
+    Off when QA_SIMPLE_MODEL is empty or names the model (on Azure: the
+    deployment) that get_llm() already uses, since then there is no cheaper
+    model to route to.
+    """
+    default = config.AZURE_OPENAI_DEPLOYMENT if _use_azure() else _DEFAULT_CHAT_MODEL
+    if not config.QA_SIMPLE_MODEL or config.QA_SIMPLE_MODEL == default:
+        return None
+    return get_llm(model=config.QA_SIMPLE_MODEL, max_tokens=config.QA_SIMPLE_MAX_TOKENS)
+
+
+def embedding_target(model: str | None = None) -> Tuple[str, ...]:
+    """
+    Identify what get_embeddings(model) actually calls: provider plus model,
+    or on Azure the endpoint and embedding deployment (model is then only a label).
+
+    Stores built with different targets hold incompatible vectors.
+    """
+    if _use_azure():
+        return ("azure", config.AZURE_OPENAI_ENDPOINT.rstrip("/"), config.AZURE_OPENAI_EMBEDDING_DEPLOYMENT)
+    return ("openai", model or _DEFAULT_EMBEDDING_MODEL)
+
+
+@lru_cache(maxsize=8)
 def get_embeddings(
     model: str | None = None,
 ) -> Embeddings:
-    """Return embeddings (OpenAI or Azure) based on LLM_PROVIDER."""
-    if config.LLM_PROVIDER.lower() == "azure":
-        from langchain_openai import AzureOpenAIEmbeddings
-        return AzureOpenAIEmbeddings(
+    """
+    Return embeddings (OpenAI or Azure) based on LLM_PROVIDER.
+
+    Cached per model like get_llm, so ingest, Q&A and startup warmup share one client.
+    """
+    _, embeddings_class = _client_classes()
+    if _use_azure():
+        return embeddings_class(
             azure_endpoint=config.AZURE_OPENAI_ENDPOINT,
             api_key=config.AZURE_OPENAI_API_KEY,
             api_version="2024-02-15-preview",
             azure_deployment=config.AZURE_OPENAI_EMBEDDING_DEPLOYMENT,
             model=model or config.AZURE_OPENAI_EMBEDDING_DEPLOYMENT,
+            http_client=_http_client(),
         )
     # Default: OpenAI
-    from langchain_openai import OpenAIEmbeddings
-    return OpenAIEmbeddings(model=model or "text-embedding-3-small")
+    return embeddings_class(model=model or _DEFAULT_EMBEDDING_MODEL, http_client=_http_client())
@@ -0,0 +1,13 @@
+"""PDF page-range text extraction; kept light so worker processes import it quickly."""
+from __future__ import annotations
+
+import io
+from pathlib import Path
+from typing import List
+
+
+def extract_pages(source: str | Path | bytes, start: int, stop: int) -> List[str]:
+    """Extract text of pages [start, stop) with a reader private to the caller."""
+    from pypdf import PdfReader
+    reader = PdfReader(io.BytesIO(source) if isinstance(source, bytes) else source)
+    return [reader.pages[i].extract_text() or "" for i in range(start, stop)]
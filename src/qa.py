@@ -1,22 +1,27 @@
 """Document Q&A workflow: retrieve, prompt LLM, apply human-review gate."""
 from __future__ import annotations
 
+import io
 import re
-from typing import Any, List
+from typing import Any, Callable, List
 
 from langchain_core.documents import Document
 from langchain_core.language_models import BaseChatModel
-from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
 from langchain_core.vectorstores import VectorStore
 
 from . import config
 from .gates import qa_needs_review
-from .retrieval import retrieve
+from .retrieval import aretrieve, retrieve
+from .streaming import TokenForwarder
 
 QA_SYSTEM = """You answer questions using ONLY the provided context. If the answer is not in the context, say "I don't know" or that the information is not in the document.
 Cite which chunk(s) support your answer (e.g. "Chunk 1").
 At the end, on a new line, write your confidence as a number from 0.0 to 1.0, e.g. "Confidence: 0.85"."""
 
+# Most-static first (system message, then retrieved context, then the question),
+# so provider prefix caching can reuse everything before the question when the
+# same chunks come back for a follow-up question.
 QA_USER_TEMPLATE = """Context (chunks from the document):
 
 {context}
@@ -25,18 +30,44 @@ Question: {question}
 
 Answer based only on the context above. End with "Confidence: X.XX"."""
 
+_QA_SYSTEM_MSG = SystemMessage(content=QA_SYSTEM)
+
 
 def _format_context(chunks: List[Document]) -> str:
-    parts = []
+    # Written straight into one buffer instead of a list of per-chunk strings
+    buf = io.StringIO()
     for i, doc in enumerate(chunks, 1):
-        parts.append(f"[Chunk {i}]\n{doc.page_content}")
-    return "\n\n".join(parts)
+        if i > 1:
+            buf.write("\n\n")
+        buf.write(f"[Chunk {i}]\n")
+        buf.write(doc.page_content)
+    return buf.getvalue()
+
+
+_CONF_RE = re.compile(r"\s*Confidence:\s*([0-9]*\.?[0-9]+)\s*$", re.IGNORECASE)
+_CONF_LABEL = "Confidence:"
+_DIGITS = frozenset("0123456789")
+
+
+def _is_confidence_number(value: str) -> bool:
+    """True if value matches [0-9]*\\.?[0-9]+ exactly (what _CONF_RE captures)."""
+    whole, dot, frac = value.partition(".")
+    if dot:
+        return bool(frac) and _DIGITS.issuperset(whole) and _DIGITS.issuperset(frac)
+    return bool(whole) and _DIGITS.issuperset(whole)
 
 
 def _parse_confidence(content: str) -> tuple[str, float | None]:
     """Extract confidence line and return (answer_without_confidence, confidence)."""
     content = content.strip()
-    match = re.search(r"\s*Confidence:\s*([0-9]*\.?[0-9]+)\s*$", content, re.IGNORECASE)
+    # Fast path for the usual well-formed ending; anything else goes to the regex
+    idx = content.rfind(_CONF_LABEL)
+    if idx != -1:
+        value = content[idx + len(_CONF_LABEL) :].strip()
+        if _is_confidence_number(value):
+            conf = max(0.0, min(1.0, float(value)))
+            return content[:idx].strip(), conf
+    match = _CONF_RE.search(content)
     if match:
         try:
             conf = float(match.group(1))
@@ -55,11 +86,21 @@ def run_qa(
     top_k: int | None = None,
     threshold_low_confidence: float | None = None,
     min_chunks: int | None = None,
+    query_embedding: List[float] | None = None,
+    simple_llm: BaseChatModel | None = None,
     **kwargs: Any,
 ) -> dict[str, Any]:
     """
     Run document Q&A: retrieve chunks, prompt LLM, apply human-review gate.
 
+    query_embedding: optional precomputed embedding of the question (avoids
+    embedding it twice when the caller already has it).
+
+    simple_llm: optional cheaper model (e.g. llm_factory.get_simple_llm()).
+    Short factual questions are answered by it first; llm is only called if
+    that answer would need review or lacks its confidence line (e.g. cut off
+    by a token cap).
+
     Returns:
         {
             "answer": str,
@@ -69,15 +110,86 @@ def run_qa(
             "review_reason": str,
         }
     """
-    chunks = retrieve(vector_store, question, top_k=top_k)
-    context = _format_context(chunks)
-
-    user_msg = QA_USER_TEMPLATE.format(context=context, question=question)
-    messages = [
-        SystemMessage(content=QA_SYSTEM),
-        HumanMessage(content=user_msg),
-    ]
+    chunks = retrieve(vector_store, question, top_k=top_k, embedding=query_embedding)
+    messages = _qa_messages(question, chunks)
+    if simple_llm is not None and _is_simple_question(question):
+        result = _qa_result(simple_llm.invoke(messages), chunks, threshold_low_confidence, min_chunks)
+        if _accept_simple(result):
+            return result
     response = llm.invoke(messages)
+    return _qa_result(response, chunks, threshold_low_confidence, min_chunks)
+
+
+async def arun_qa(
+    question: str,
+    vector_store: VectorStore,
+    llm: BaseChatModel,
+    top_k: int | None = None,
+    threshold_low_confidence: float | None = None,
+    min_chunks: int | None = None,
+    query_embedding: List[float] | None = None,
+    simple_llm: BaseChatModel | None = None,
+    on_token: Callable[[str], None] | None = None,
+    **kwargs: Any,
+) -> dict[str, Any]:
+    """Async run_qa(): same arguments and result, awaiting the LLM with ainvoke.
+
+    Lets callers overlap independent LLM round-trips, e.g. with asyncio.gather.
+
+    on_token: called with each answer token as it arrives when the LLM streams
+    (e.g. ChatOpenAI(streaming=True)); otherwise, e.g. on an LLM cache hit,
+    once with the whole response. Use it to show or time the first token.
+    Model routing (see run_qa) applies only without on_token, so streamed
+    tokens always belong to the returned answer.
+    """
+    chunks = await aretrieve(vector_store, question, top_k=top_k, embedding=query_embedding)
+    messages = _qa_messages(question, chunks)
+    if on_token is None:
+        if simple_llm is not None and _is_simple_question(question):
+            response = await simple_llm.ainvoke(messages)
+            result = _qa_result(response, chunks, threshold_low_confidence, min_chunks)
+            if _accept_simple(result):
+                return result
+        response = await llm.ainvoke(messages)
+    else:
+        tokens = TokenForwarder(on_token)
+        response = await llm.ainvoke(messages, config={"callbacks": [tokens]})
+        if not tokens.streamed:
+            on_token(getattr(response, "content", str(response)))
+    return _qa_result(response, chunks, threshold_low_confidence, min_chunks)
+
+
+# Short lookups of a single fact; anything asking for reasoning stays on the main model
+_SIMPLE_QUESTION_RE = re.compile(r"^\s*(what|when|who|which|where|how (much|many|long))\b", re.IGNORECASE)
+_COMPLEX_QUESTION_RE = re.compile(
+    r"\b(why|explain|compare|summari[sz]e|analy[sz]e|differen\w*|implications?|pros|cons)\b", re.IGNORECASE
+)
+
+
+def _is_simple_question(question: str) -> bool:
+    """True for a short factual question that simple_llm may answer."""
+    if len(question) > config.QA_SIMPLE_MAX_CHARS:
+        return False
+    return bool(_SIMPLE_QUESTION_RE.match(question)) and not _COMPLEX_QUESTION_RE.search(question)
+
+
+def _accept_simple(result: dict[str, Any]) -> bool:
+    # A missing confidence line usually means the answer hit the token cap
+    return not result["needs_review"] and result["confidence"] is not None
+
+
+def _qa_messages(question: str, chunks: List[Document]) -> List[BaseMessage]:
+    user_msg = QA_USER_TEMPLATE.format(context=_format_context(chunks), question=question)
+    return [_QA_SYSTEM_MSG, HumanMessage(content=user_msg)]
+
+
+def _qa_result(
+    response: Any,
+    chunks: List[Document],
+    threshold_low_confidence: float | None,
+    min_chunks: int | None,
+) -> dict[str, Any]:
+    """Parse the LLM response and apply the review gate (shared by run_qa and arun_qa)."""
     content = getattr(response, "content", str(response))
     answer, confidence = _parse_confidence(content)
 
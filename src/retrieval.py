@@ -1,6 +1,11 @@
 """Retrieval: query vector store for top-k chunks."""
 from __future__ import annotations
 
+import asyncio
+import hashlib
+import threading
+import weakref
+from collections import OrderedDict
 from typing import Any, List
 
 from langchain_core.documents import Document
@@ -8,24 +13,103 @@ from langchain_core.vectorstores import VectorStore
 
 from . import config
 
+# vector store -> LRU of (query digest, k) -> chunks. Weak keys drop a store's
+# entries as soon as the store itself is replaced and garbage collected.
+_RETRIEVAL_CACHE: "weakref.WeakKeyDictionary[VectorStore, OrderedDict]" = weakref.WeakKeyDictionary()
+_RETRIEVAL_CACHE_LOCK = threading.Lock()
+
+
+def clear_retrieval_cache() -> None:
+    """Drop all cached retrieval results (call after replacing a vector store)."""
+    with _RETRIEVAL_CACHE_LOCK:
+        _RETRIEVAL_CACHE.clear()
+
+
+def _cache_key(query: str, k: int) -> tuple[bytes, int]:
+    return hashlib.blake2b(query.encode("utf-8"), digest_size=8).digest(), k
+
+
+def _resolve_parents(vector_store: VectorStore, chunks: List[Document]) -> List[Document]:
+    """Replace child chunks by their parent documents, keeping first-hit order and dropping repeats."""
+    docstore = getattr(vector_store, "docstore", None)
+    if docstore is None or not any("parent_id" in doc.metadata for doc in chunks):
+        return chunks
+    seen: set[str] = set()
+    resolved = []
+    for doc in chunks:
+        parent_id = doc.metadata.get("parent_id")
+        if parent_id is None:
+            resolved.append(doc)
+            continue
+        if parent_id in seen:
+            continue
+        seen.add(parent_id)
+        parent = docstore.search(parent_id)
+        # InMemoryDocstore returns an error string for unknown ids
+        resolved.append(parent if isinstance(parent, Document) else doc)
+    return resolved
+
 
 def retrieve(
     vector_store: VectorStore,
     query: str,
     top_k: int | None = None,
+    embedding: List[float] | None = None,
     **kwargs: Any,
 ) -> List[Document]:
     """
     Retrieve top-k chunks from the vector store for a query.
 
+    Results for plain (query, top_k) lookups are cached per vector store, so
+    repeated extraction calls with the same schema query skip the vector search.
+
+    Chunks indexed with a "parent_id" (see config.PARENT_CHUNK_SIZE) are
+    returned as their parent documents, so up to top_k distinct parents come back.
+
     Args:
         vector_store: Vector store from ingestion (FAISS, Chroma, etc.).
         query: Search query (e.g. user question or extraction intent).
         top_k: Number of chunks to return (default from config).
-        **kwargs: Passed to vector_store.similarity_search.
+        embedding: Precomputed query embedding; skips re-embedding the query.
+        **kwargs: Passed to vector_store.similarity_search (disables caching).
 
     Returns:
         List of Document chunks, ordered by relevance.
     """
     k = top_k if top_k is not None else config.RETRIEVAL_TOP_K
-    return vector_store.similarity_search(query, k=k, **kwargs)
+    use_cache = config.RETRIEVAL_CACHE_SIZE > 0 and not kwargs
+    if use_cache:
+        key = _cache_key(query, k)
+        with _RETRIEVAL_CACHE_LOCK:
+            entries = _RETRIEVAL_CACHE.get(vector_store)
+            if entries is not None and key in entries:
+                entries.move_to_end(key)
+                return list(entries[key])
+
+    if embedding is not None:
+        chunks = vector_store.similarity_search_by_vector(embedding, k=k, **kwargs)
+    else:
+        chunks = vector_store.similarity_search(query, k=k, **kwargs)
+    chunks = _resolve_parents(vector_store, chunks)
+
+    if use_cache:
+        with _RETRIEVAL_CACHE_LOCK:
+            entries = _RETRIEVAL_CACHE.setdefault(vector_store, OrderedDict())
+            entries[key] = list(chunks)
+            while len(entries) > config.RETRIEVAL_CACHE_SIZE:
+                entries.popitem(last=False)
+    return chunks
+
+
+async def aretrieve(
+    vector_store: VectorStore,
+    query: str,
+    top_k: int | None = None,
+    embedding: List[float] | None = None,
+    **kwargs: Any,
+) -> List[Document]:
+    """Async retrieve(): runs the query embedding and search in a worker thread.
+
+    Shares retrieve()'s cache; the event loop stays free for other LLM calls.
+    """
+    return await asyncio.to_thread(retrieve, vector_store, query, top_k, embedding, **kwargs)
@@ -0,0 +1,25 @@
+"""Forward streamed LLM tokens to plain callables."""
+from __future__ import annotations
+
+from typing import Any, Callable
+
+from langchain_core.callbacks import AsyncCallbackHandler
+
+
+class TokenForwarder(AsyncCallbackHandler):
+    """
+    Callback handler that passes each streamed LLM token to on_token.
+
+    Attach it per call (llm.ainvoke(messages, config={"callbacks": [handler]}));
+    it only fires when the model streams (e.g. ChatOpenAI(streaming=True)).
+    streamed tells the caller afterwards whether any token arrived.
+    """
+
+    def __init__(self, on_token: Callable[[str], None]) -> None:
+        self.on_token = on_token
+        self.streamed = False
+
+    async def on_llm_new_token(self, token: str, **kwargs: Any) -> None:
+        if token:
+            self.streamed = True
+            self.on_token(token)
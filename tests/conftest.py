@@ -0,0 +1,29 @@
+"""Shared pytest setup: project root on sys.path, event loop policy and command-line options."""
+from __future__ import annotations
+
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+# uvloop ships with uvicorn[standard]; asyncio.new_event_loop() then returns a uvloop loop
+if sys.platform != "win32":
+    try:
+        import uvloop
+    except ImportError:
+        pass
+    else:
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    parser.addoption(
+        "--no-llm-cache",
+        action="store_true",
+        help="Call the LLM for every prompt and overwrite its entry in .cache/llm_cache.sqlite",
+    )
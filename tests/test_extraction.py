@@ -0,0 +1,39 @@
+"""Streaming extraction fields: _JsonFieldStream against the final JSON parse.
+
+Run from the project root: python -m pytest tests -s
+"""
+from __future__ import annotations
+
+import pytest
+
+from src.extraction import DefaultExtractionSchema, _extract_json_object, _JsonFieldStream
+
+RECORD = '{"parties": "Acme Inc and Beta LLC", "dates": "2025-01-15", "amounts": 120000, "uncertain_fields": []}'
+
+RESPONSES = {
+    "bare": RECORD,
+    "fenced": f"```json\n{RECORD}\n```",
+    # A stray "{" before the object must not hide its fields
+    "brace_in_prose": f"Fields use {{curly}} placeholders; here is the record:\n{RECORD}",
+    "brace_in_fence": "```python\nrecord = {**defaults, 'source': path}\n```\n" + RECORD,
+}
+
+
+def _stream(content: str, step: int) -> dict[str, object]:
+    fields: dict[str, object] = {}
+    stream = _JsonFieldStream(fields.__setitem__, DefaultExtractionSchema.model_fields.keys())
+    for i in range(0, len(content), step):
+        stream.feed(content[i : i + step])
+    return fields
+
+
+@pytest.mark.parametrize("step", [1, 7, 10_000])
+@pytest.mark.parametrize("name", list(RESPONSES))
+def test_streamed_fields_match_final_parse(name: str, step: int):
+    """Every schema field in the final record is streamed, whatever precedes the object."""
+    content = RESPONSES[name]
+    expected = {
+        k: v for k, v in _extract_json_object(content).items() if k in DefaultExtractionSchema.model_fields
+    }
+    assert expected, "the case should contain a record"
+    assert _stream(content, step) == expected
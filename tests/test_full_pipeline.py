@@ -1,80 +1,222 @@
-#!/usr/bin/env python3
-"""Full pipeline test: ingest, Q&A, extraction."""
+"""Full pipeline test: ingest, Q&A, extraction.
+
+Run from the project root: python -m pytest tests -s
+
+LLM responses are cached in .cache/llm_cache.sqlite, keyed by model, parameters and
+prompt, and never expire. Pass --no-llm-cache to regenerate them: every prompt goes
+to the model and its fresh response overwrites the stored one. Use it for runs that
+must see fresh answers (e.g. after a prompt's data changed); delete the file to
+drop all entries.
+"""
 from __future__ import annotations
 
+import asyncio
+import logging
 import os
+import queue
 import sys
+import time
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
+from typing import Any, Awaitable, Callable, Iterator
 
-# Add project root to path
-sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
-
+import httpx
+import pytest
 from dotenv import load_dotenv
 
+# Skip (rather than fail collection) where the OpenAI integration is not installed
+langchain_openai = pytest.importorskip("langchain_openai")
+
+import openai
+from langchain_community.cache import SQLiteCache
+from langchain_core.globals import set_llm_cache
+
+from src.extraction import DefaultExtractionSchema, arun_extraction
+from src.ingest import ingest_documents
+from src.qa import arun_qa
+
 load_dotenv()
 
+ROOT = Path(__file__).resolve().parent.parent
+# LLM responses are persisted here so repeat runs (e.g. in CI) skip the API round-trip
+LLM_CACHE_PATH = ROOT / ".cache" / "llm_cache.sqlite"
+# Ingested stores, keyed by input content and settings (unchanged inputs skip embedding).
+# The key covers the file bytes, so parallel workers (pytest-xdist) share one entry.
+VECTOR_CACHE_DIR = ROOT / ".cache" / "vectors"
+# QUANTIZE_EMBEDDINGS=1 runs the pipeline on an int8 (sq8) index instead of float32
+INDEX_TYPE = "sq8" if os.getenv("QUANTIZE_EMBEDDINGS", "0") == "1" else None
+# Max seconds from starting Q&A to its first answer token (latency regression guard)
+TTFT_BUDGET_S = float(os.getenv("TTFT_BUDGET_S", "5.0"))
 
-def test_full_pipeline():
-    """Run ingest → Q&A → extraction and assert results."""
-    from langchain_openai import ChatOpenAI
+# Questions asked against the shared store; add more here without re-ingesting
+QA_QUESTIONS = [
+    "What is the total contract value?",
+]
 
-    from src.extraction import DefaultExtractionSchema, run_extraction
-    from src.ingest import ingest_documents
-    from src.qa import run_qa
 
-    if not os.getenv("OPENAI_API_KEY", "").strip():
-        raise SystemExit("OPENAI_API_KEY not set. Add to .env and retry.")
+# Ingest progress goes through a queue; a listener thread does the actual writes
+log = logging.getLogger("pipeline")
+
+
+class _RefreshingCache(SQLiteCache):
+    """Never serves a stored response, but stores the fresh one (--no-llm-cache)."""
+
+    def lookup(self, prompt: str, llm_string: str) -> None:
+        return None
+
 
-    data_dir = Path(__file__).resolve().parent.parent / "data"
-    sample_file = data_dir / "sample_contract.txt"
-    if not sample_file.exists():
-        raise SystemExit(f"Sample file not found: {sample_file}")
+def _enable_llm_cache(refresh: bool = False) -> None:
+    """Serve repeated prompts (same model, temperature and messages) from LLM_CACHE_PATH.
 
+    refresh: skip cached responses and overwrite them with fresh ones.
+    """
+    LLM_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+    cache_class = _RefreshingCache if refresh else SQLiteCache
+    set_llm_cache(cache_class(database_path=str(LLM_CACHE_PATH)))
+
+
+def _banner(title: str) -> None:
     print("=" * 60)
-    print("1. INGEST")
+    print(title)
     print("=" * 60)
 
+
+@pytest.fixture(scope="session")
+def run() -> Iterator[Callable[[Awaitable[Any]], Any]]:
+    """Run coroutines on one event loop for the session (async HTTP clients are loop-bound)."""
+    loop = asyncio.new_event_loop()
+    yield loop.run_until_complete
+    loop.close()
+
+
+@pytest.fixture(scope="session")
+def progress_log() -> Iterator[logging.Logger]:
+    """Route the pipeline logger through a QueueHandler, written out off-thread."""
+    records: queue.SimpleQueue = queue.SimpleQueue()
+    listener = QueueListener(records, logging.StreamHandler(sys.stdout))
+    handler = QueueHandler(records)
+    log.addHandler(handler)
+    log.setLevel(logging.INFO)
+    log.propagate = False
+    listener.start()
+    yield log
+    listener.stop()  # drains what is still queued
+    log.removeHandler(handler)
+
+
+@pytest.fixture(scope="session")
+def sample_file() -> Path:
+    if not os.getenv("OPENAI_API_KEY", "").strip():
+        pytest.skip("OPENAI_API_KEY not set. Add to .env and retry.")
+    path = ROOT / "data" / "sample_contract.txt"
+    if not path.exists():
+        pytest.fail(f"Sample file not found: {path}")
+    return path
+
+
+@pytest.fixture(scope="session")
+def vector_store(sample_file: Path, progress_log: logging.Logger):
+    """Ingest the sample contract once per session."""
+    _banner("1. INGEST")
+
     def on_progress(msg: str, p: float) -> None:
-        print(f"  [{p*100:.0f}%] {msg}")
+        progress_log.info("  [%.0f%%] %s", p * 100, msg)
 
-    vector_store = ingest_documents(
+    store = ingest_documents(
         [str(sample_file)],
+        persist_directory=str(VECTOR_CACHE_DIR),
+        index_type=INDEX_TYPE,
         progress_callback=on_progress,
     )
-    print("  OK: Ingest complete\n")
+    # Same queue as the progress lines, so it cannot overtake them
+    progress_log.info("  OK: Ingest complete\n")
+    return store
 
-    print("=" * 60)
-    print("2. Q&A")
-    print("=" * 60)
 
-    llm = ChatOpenAI(model="gpt-4o-mini", temperature=0)
-    qa_result = run_qa("What is the total contract value?", vector_store, llm)
+@pytest.fixture(scope="session")
+def http_async_client(run) -> Iterator[httpx.AsyncClient]:
+    """One keep-alive connection pool for every async LLM call, closed on the session loop."""
+    client = openai.DefaultAsyncHttpxClient(
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=60.0)
+    )
+    yield client
+    run(client.aclose())
+
+
+@pytest.fixture(scope="session")
+def llm(sample_file: Path, pytestconfig: pytest.Config, http_async_client: httpx.AsyncClient):
+    """One cached, streaming client shared by Q&A and extraction."""
+    _enable_llm_cache(refresh=pytestconfig.getoption("no_llm_cache"))
+    return langchain_openai.ChatOpenAI(
+        model="gpt-4o-mini", temperature=0, streaming=True, http_async_client=http_async_client
+    )
+
+
+def test_ingest(vector_store):
+    """Ingest produces a searchable store."""
+    assert vector_store.index.ntotal > 0, "Ingest should index at least one chunk"
+
+
+@pytest.mark.parametrize("question", QA_QUESTIONS)
+def test_qa(vector_store, llm, run, question: str):
+    """Q&A answers from the store, with the first token inside TTFT_BUDGET_S."""
+    t_first: float | None = None
+
+    def on_token(token: str) -> None:
+        nonlocal t_first
+        if t_first is None:
+            t_first = time.perf_counter()
 
-    print(f"  Question: What is the total contract value?")
+    t_start = time.perf_counter()
+    qa_result = run(arun_qa(question, vector_store, llm, on_token=on_token))
+    t_total = time.perf_counter() - t_start
+
+    _banner("2. Q&A")
+    print(f"  Question: {question}")
     print(f"  Answer: {qa_result['answer'][:200]}...")
     print(f"  Confidence: {qa_result.get('confidence', 'N/A')}")
     print(f"  Needs review: {qa_result['needs_review']} ({qa_result['review_reason']})")
     print(f"  Source chunks: {len(qa_result['source_chunks'])}")
     assert qa_result["answer"], "Q&A should return an answer"
+    assert t_first is not None, "Q&A should report at least one token"
+    ttft = t_first - t_start
+    print(f"  TTFT: {ttft:.2f}s (budget {TTFT_BUDGET_S:.1f}s), total: {t_total:.2f}s")
+    assert ttft < TTFT_BUDGET_S, f"First token after {ttft:.2f}s exceeds TTFT_BUDGET_S={TTFT_BUDGET_S}"
     print("  OK: Q&A complete\n")
 
-    print("=" * 60)
-    print("3. EXTRACTION")
-    print("=" * 60)
 
-    ext_result = run_extraction(vector_store, DefaultExtractionSchema, llm)
+def test_extraction(vector_store, llm, run):
+    """Extraction returns a record for the default schema."""
+    field_times: dict[str, float] = {}
+
+    def on_field(name: str, value: object) -> None:
+        field_times[name] = time.perf_counter() - t_start
+
+    t_start = time.perf_counter()
+    ext_result = run(arun_extraction(vector_store, DefaultExtractionSchema, llm, on_field=on_field))
+    t_total = time.perf_counter() - t_start
 
+    _banner("3. EXTRACTION")
     print(f"  Record: {ext_result['record']}")
     print(f"  Uncertain fields: {ext_result.get('uncertain_fields', [])}")
     print(f"  Validation errors: {ext_result.get('validation_errors', [])}")
     print(f"  Needs review: {ext_result['needs_review']} ({ext_result['review_reason']})")
     assert "record" in ext_result, "Extraction should return a record"
+    streamed = ", ".join(f"{name} {t:.2f}s" for name, t in field_times.items())
+    print(f"  Fields streamed: {streamed or 'none'} (total {t_total:.2f}s)")
     print("  OK: Extraction complete\n")
 
-    print("=" * 60)
-    print("ALL TESTS PASSED")
-    print("=" * 60)
 
+def test_full_pipeline(vector_store, llm, run):
+    """Q&A and extraction together, overlapping their LLM round-trips."""
+    async def _both() -> tuple[dict, dict]:
+        return await asyncio.gather(
+            arun_qa(QA_QUESTIONS[0], vector_store, llm),
+            arun_extraction(vector_store, DefaultExtractionSchema, llm),
+        )
+
+    qa_result, ext_result = run(_both())
+    assert qa_result["answer"], "Q&A should return an answer"
+    assert "record" in ext_result, "Extraction should return a record"
 
-if __name__ == "__main__":
-    test_full_pipeline()
+    _banner("ALL TESTS PASSED")